@@ -0,0 +1,257 @@
+"""
+Benchmark - measures real-time factor (RTF) of the synthesis pipeline
+RTF = wall time spent synthesizing / duration of the audio produced (lower is faster)
+Memory = measured with tracemalloc in a second untimed pass after a warm-up,
+rendering into a reused output buffer: peak KB is the most any one corpus text
+raises traced memory during its render, kept KB the NumPy array data (NumPy's
+tracemalloc domain) still held after the pass, i.e. what the buffer pools and
+caches grew by.
+--check runs output regression checks instead and exits with status 1 on failure.
+"""
+
+import argparse
+import re
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.engine import TailSafetyEngine
+from src.tracing import Tracer
+from src.g2p_rules import RuleG2P
+from src.config import SAMPLE_RATE, VOICE_PROFILES, QUALITY_TIERS
+
+CORPUS = [
+    "Hello world. I am a formant synthesizer.",
+    "Press one for billing, press two for technical support.",
+    "The quick brown fox jumps over the lazy dog.",
+    "Please wait while we connect your call, this may take a moment.",
+    "She sells sea shells by the sea shore, and the shells she sells are surely seashells.",
+    "Loading. Done. Your download is complete.",
+    "Peter Piper picked a peck of pickled peppers.",
+    "Thank you for calling, goodbye!",
+]
+RU_CORPUS = [
+    "Здравствуйте, вы позвонили в службу поддержки.",
+    "Пожалуйста, оставайтесь на линии, ваш звонок очень важен для нас.",
+    "Нажмите один для оплаты, нажмите два для технической поддержки.",
+    "Съешь же ещё этих мягких французских булок да выпей чаю.",
+    "Загрузка завершена. Спасибо за ожидание, до свидания!",
+    "Сегодня в городе дождь, а завтра будет солнце и ветер.",
+]
+AR_CORPUS = [
+    "مرحبا بكم في خدمة العملاء.",
+    "يرجى الانتظار، سيتم تحويل مكالمتك الآن.",
+    "اضغط واحد للفواتير، اضغط اثنين للدعم الفني.",
+    "السَّلَامُ عَلَيْكُمْ وَرَحْمَةُ اللَّهِ وَبَرَكَاتُهُ.",
+    "شُكْرًا لِاتِّصَالِكَ، مَعَ السَّلَامَةِ!",
+    "الشمس تشرق كل يوم والقمر يضيء في الليل.",
+]
+
+
+def numpy_traced_bytes():
+    """Bytes of NumPy array data currently traced by tracemalloc (NumPy >= 1.22 tags it with its own domain)"""
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)])
+    return sum(trace.size for trace in snapshot.traces)
+
+
+def bench_memory(engine, quality, corpus):
+    """
+    (peak bytes, kept bytes) of a render into one reused buffer: the highest
+    tracemalloc peak above the starting level over the corpus texts, and the
+    NumPy array data still held after the pass (None before NumPy 1.22)
+    """
+    out = np.zeros(SAMPLE_RATE * 60, dtype=np.float32)
+    for text in corpus:  # warm up: pool sizes, filter design caches, JIT
+        engine.render(text, quality=quality, seed=0, out=out)
+    domain = hasattr(np.lib, 'tracemalloc_domain')
+    tracemalloc.start()
+    try:
+        start = numpy_traced_bytes() if domain else 0
+        peak = 0
+        for text in corpus:
+            tracemalloc.reset_peak()
+            level = tracemalloc.get_traced_memory()[0]
+            engine.render(text, quality=quality, seed=0, out=out)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - level)
+        kept = numpy_traced_bytes() - start if domain else None
+    finally:
+        tracemalloc.stop()
+    return peak, kept
+
+
+def bench_tier(engine, quality, corpus):
+    samples = 0
+    t0 = time.perf_counter()
+    for text in corpus:
+        samples += len(engine.render(text, quality=quality, seed=0))
+    elapsed = time.perf_counter() - t0
+    return elapsed, samples / SAMPLE_RATE
+
+
+def bench_g2p(g2p, corpus, repeats=20):
+    """Words per second of per-word predict() against clause-level predict_batch()"""
+    clauses = [c.split() for text in corpus for c in re.split(r'[.,!?;:]', text) if c.strip()]
+    n_words = sum(len(c) for c in clauses) * repeats
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for clause in clauses:
+            for w in clause:
+                g2p.predict(w)
+    per_word = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for clause in clauses:
+            g2p.predict_batch(clause)
+    batched = time.perf_counter() - t0
+    return n_words / per_word, n_words / batched
+
+
+def bench_rule_g2p(g2p, corpus, script, repeats=200):
+    """
+    Words per second for RU or AR text: the per-letter maps, the compiled rules
+    with no word cache (one pass per clause) and the rules behind the warm LRU
+    word cache, as predict_batch uses them. The corpus is repeated repeats times.
+    """
+    clauses = [c.split() for text in corpus for c in re.split(r'[.,!?;:،]', text) if c.strip()] * repeats
+    n_words = sum(len(c) for c in clauses)
+    t0 = time.perf_counter()
+    for clause in clauses:
+        for w in clause:
+            g2p.predict_letters(w, script)
+    letters = time.perf_counter() - t0
+    uncached = RuleG2P(g2p.ru_rules.rules if script == 'RU' else g2p.ar_rules.rules, cache_size=0)
+    t0 = time.perf_counter()
+    for clause in clauses:
+        uncached.predict_words(clause)
+    rules = time.perf_counter() - t0
+    cached_rules = g2p.ru_rules if script == 'RU' else g2p.ar_rules
+    for clause in clauses[:len(clauses) // repeats]:
+        cached_rules.predict_words(clause)  # warm the word cache
+    t0 = time.perf_counter()
+    for clause in clauses:
+        cached_rules.predict_words(clause)
+    cached = time.perf_counter() - t0
+    return n_words, n_words / letters, n_words / rules, n_words / cached
+
+
+def check_levels(engine, corpus, seeds=range(8)):
+    """Largest |sample| of any streamed chunk, per tier (must stay within full scale)"""
+    worst = {}
+    for quality in QUALITY_TIERS:
+        worst[quality] = max(float(np.abs(chunk).max(initial=0.0))
+                             for seed in seeds for text in corpus
+                             for chunk in engine.stream(text, quality=quality, seed=seed))
+    return worst
+
+
+ADAPTIVE_MIN_SNR = 30.0  # dB, adaptive control rate against the tier's fixed grid
+# Russian words the penultimate-vowel guess would mis-stress (covered by the stress lexicon)
+RU_STRESS_CHECKS = {
+    'москва': 'M AA S K V AA1', 'вокзал': 'V AA G Z AA1 L', 'рассказ': 'RR AA S K AA1 S',
+    'любовь': 'L Y UW B AO1 F Y', 'человек': 'CH IH L AA V EH1 K', 'говорит': 'G AH V AA RR IY1 T',
+    'пожалуйста': 'P AA ZH AA1 L UW Y S T AH',
+}
+
+
+def check_adaptive_snr(engine, quality, corpus):
+    """
+    (whole-corpus SNR, worst per-text SNR) in dB of the tier's adaptive control
+    rate against the same tier on its fixed grid (adaptive_tol 0), same seeds
+    """
+    tier = QUALITY_TIERS[quality]
+    tol = tier['adaptive_tol']
+    tier['adaptive_tol'] = 0.0
+    try:
+        fixed = [engine.render(text, quality=quality, seed=i) for i, text in enumerate(corpus)]
+    finally:
+        tier['adaptive_tol'] = tol
+    adaptive = [engine.render(text, quality=quality, seed=i) for i, text in enumerate(corpus)]
+
+    def snr(ref, out):
+        ref, out = ref.astype(np.float64), out.astype(np.float64)
+        return 10.0 * np.log10(np.sum(ref * ref) / max(np.sum((ref - out) ** 2), 1e-30))
+    return snr(np.concatenate(fixed), np.concatenate(adaptive)), min(map(snr, fixed, adaptive))
+
+
+def check_stress(g2p):
+    """Words of RU_STRESS_CHECKS whose phonemes differ: word -> (got, expected)"""
+    return {w: (' '.join(p), RU_STRESS_CHECKS[w])
+            for w, (p, _) in zip(RU_STRESS_CHECKS, g2p.predict_batch(list(RU_STRESS_CHECKS)))
+            if ' '.join(p) != RU_STRESS_CHECKS[w]}
+
+
+def run_checks(engine):
+    """Output regression checks; returns True if all pass"""
+    ok = True
+    for quality, level in check_levels(engine, CORPUS + [' '.join(CORPUS[2:5])]).items():
+        passed = level <= 1.0
+        ok &= passed
+        print(f"chunk peak  {quality:<10} {level:6.3f}  {'ok' if passed else 'FAIL (> 1.0)'}")
+    for quality, tier in QUALITY_TIERS.items():
+        if tier.get('adaptive_tol', 0.0) <= 0:
+            continue
+        total, worst = check_adaptive_snr(engine, quality, CORPUS)
+        passed = worst >= ADAPTIVE_MIN_SNR
+        ok &= passed
+        print(f"adaptive    {quality:<10} SNR {total:5.1f} dB (worst text {worst:5.1f} dB)  "
+              f"{'ok' if passed else f'FAIL (< {ADAPTIVE_MIN_SNR:.0f} dB)'}")
+    wrong = check_stress(engine.g2p)
+    ok &= not wrong
+    print(f"ru stress   {len(RU_STRESS_CHECKS) - len(wrong)}/{len(RU_STRESS_CHECKS)} words  {'ok' if not wrong else 'FAIL'}")
+    for w, (got, expected) in wrong.items():
+        print(f"    {w}: {got} (expected {expected})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TailSafety synthesis benchmark")
+    parser.add_argument('--quality', choices=list(QUALITY_TIERS), action='append',
+                        help="tier(s) to run (default: all)")
+    parser.add_argument('--voice', default='default_female', choices=list(VOICE_PROFILES))
+    parser.add_argument('--g2p', action='store_true', help="benchmark G2P words/sec instead of synthesis")
+    parser.add_argument('--check', action='store_true',
+                        help="run output regression checks instead (exit status 1 on failure)")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="write a Chrome trace of the run and print the cost per phoneme type")
+    args = parser.parse_args()
+
+    engine = TailSafetyEngine(voice_profile=VOICE_PROFILES[args.voice])
+    engine.render(CORPUS[0])  # warm up imports / G2P
+
+    if args.check:
+        raise SystemExit(0 if run_checks(engine) else 1)
+
+    if args.g2p:
+        per_word, batched = bench_g2p(engine.g2p, CORPUS)
+        print(f"per-word predict: {per_word:10.0f} words/s")
+        print(f"predict_batch:    {batched:10.0f} words/s ({batched / per_word:.1f}x)")
+        for script, corpus in (('RU', RU_CORPUS), ('AR', AR_CORPUS)):
+            n, letters, rules, cached = bench_rule_g2p(engine.g2p, corpus, script)
+            print(f"{script} ({n} words) letter maps: {letters:10.0f} words/s, rules: {rules:10.0f} words/s "
+                  f"({rules / letters:.1f}x), rules + word cache: {cached:10.0f} words/s ({cached / letters:.1f}x)")
+        return
+
+    if args.trace:
+        engine.tracer = Tracer()  # adds some overhead to the RTF figures below
+
+    print(f"{'tier':<10} {'audio s':>8} {'synth s':>8} {'RTF':>6} {'peak KB':>8} {'kept KB':>8}")
+    for quality in args.quality or list(QUALITY_TIERS):
+        elapsed, audio = bench_tier(engine, quality, CORPUS)
+        peak, kept = bench_memory(engine, quality, CORPUS)
+        kept = f"{kept / 1024:8.0f}" if kept is not None else f"{'n/a':>8}"
+        print(f"{quality:<10} {audio:8.2f} {elapsed:8.2f} {elapsed / audio:6.3f} {peak / 1024:8.0f} {kept}")
+
+    if args.trace:
+        engine.tracer.save(args.trace)
+        print()
+        print(engine.tracer.cost_table())
+        print()
+        for stage, ms in engine.tracer.stage_costs().items():
+            print(f"{stage:<14} {ms:9.1f} ms")
+        print(f"trace written to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
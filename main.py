@@ -1,6 +1,6 @@
-# Import the engine from the source module
-from src.engine import TailSafetyEngine
-from src.voice_loader import load_voices_from_directory, get_voice_list, print_voices, get_voice_by_name
+# Import the voice pool (warm TailSafetyEngine instances) from the source modules
+from src.voice_loader import VoiceRegistry, get_voice_list, print_voices, get_voice_by_name
+from src.voice_pool import VoicePool
 from src import config
 import os
 
@@ -9,24 +9,26 @@ if __name__ == "__main__":
     print("TailSafety")
     print("use /voices To see a list of available voices")
     print("use The word voice followed by a space and then the voice number To switch to it")
+    print("use /quality followed by high, balanced or fast To change synthesis quality")
     
-    # Find voices directory (check in current directory and parent)
+    # Find voices directory (check next to main.py, then current directory and parent)
+    here = os.path.dirname(os.path.abspath(__file__))
     voices_dir = None
-    for path in ['voices', '../voices', './voices']:
+    for path in [os.path.join(here, 'Voices'), 'Voices', 'voices', '../Voices', '../voices']:
         if os.path.isdir(path):
             voices_dir = path
             break
     
-    # Load voices from directory
+    # Index voices (folders and zip archives such as ExtraVoices.zip); profiles load on first use
     if voices_dir:
         print(f"\nLoading voices from: {os.path.abspath(voices_dir)}/")
-        loaded_voices = load_voices_from_directory(voices_dir)
+        loaded_voices = VoiceRegistry(voices_dir)
     else:
         print("\nWarning: voices/ directory not found. Using fallback voices from config.")
         loaded_voices = {}
     
     # Use loaded voices if available, otherwise fallback to config profiles
-    voice_profiles = loaded_voices if loaded_voices else config.VOICE_PROFILES.copy()
+    voice_profiles = loaded_voices if len(loaded_voices) else config.VOICE_PROFILES.copy()
     
     # Display available voices
     print_voices(voice_profiles)
@@ -39,23 +41,38 @@ if __name__ == "__main__":
     else:
         raise RuntimeError("No voice profiles available. Check your 'voices' directory and config.py.")
     
-    tts = TailSafetyEngine(voice_profile=voice_profiles[current_voice_key])
+    # Warm pool: one shared G2P, voices prepared once, switching is a lookup
+    pool = VoicePool(voice_profiles).warm([current_voice_key])
+    tts = pool.engine(current_voice_key)
     print(f"\n✓ Ready. Current voice: {current_voice_name}")
     print("Version: 46")
     
     # Main interaction loop for text-to-speech processing
     while True:
         try:
-            user_input = input("\n📝 Text (or /voices, voice <num/name>, /log, exit): ").strip()
+            user_input = input("\n📝 Text (or /voices, voice <num/name>, /quality <tier>, /log, exit): ").strip()
             
             if user_input.lower() == 'exit':
                 print("Goodbye!")
                 break
             
             if user_input.lower() == '/voices':
+                if isinstance(voice_profiles, VoiceRegistry):
+                    # Only voices whose files changed or disappeared lose their warm engine
+                    pool.clear(voice_profiles.refresh())
+                    tts = pool.engine(current_voice_key) if current_voice_key in pool else tts
                 print_voices(voice_profiles, current_voice_key)
                 continue
             
+            if user_input.lower().startswith('/quality'):
+                parts = user_input.split(maxsplit=1)
+                if len(parts) > 1 and parts[1].strip().lower() in config.QUALITY_TIERS:
+                    tts.quality = pool.quality = parts[1].strip().lower()
+                    print(f"✓ Quality: {tts.quality}")
+                else:
+                    print(f"Usage: /quality <{'|'.join(config.QUALITY_TIERS)}> (current: {tts.quality})")
+                continue
+            
             
             
             if user_input.lower().startswith('voice '):
@@ -71,7 +88,8 @@ if __name__ == "__main__":
                             if 0 <= voice_num < len(voice_list):
                                 current_voice_key = voice_list[voice_num]['key']
                                 current_voice_name = voice_profiles[current_voice_key]['name']
-                                tts = TailSafetyEngine(voice_profile=voice_profiles[current_voice_key])
+                                tts = pool.engine(current_voice_key)
+                                tts.quality = pool.quality
                                 print(f"✓ Switched to: {current_voice_name}")
                             else:
                                 print(f"Please enter a number between 1 and {len(voice_list)}")
@@ -81,7 +99,8 @@ if __name__ == "__main__":
                             if matched_key:
                                 current_voice_key = matched_key
                                 current_voice_name = matched_data['name']
-                                tts = TailSafetyEngine(voice_profile=matched_data)
+                                tts = pool.engine(matched_key)
+                                tts.quality = pool.quality
                                 print(f"✓ Switched to: {current_voice_name}")
                             else:
                                 print(f"Voice '{voice_input}' not found. Use 'list' to see available voices.")
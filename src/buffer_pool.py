@@ -0,0 +1,51 @@
+"""
+Buffer pool - scratch arrays reused across control blocks and chunks
+Each engine owns one pool. get(name, n) returns a view of the first n
+elements of that name's array; the array only grows (geometrically) when a
+request does not fit, so once the largest block and chunk of a session have
+been seen, synthesis allocates no new sample buffers.
+Views are not cleared between requests and are overwritten by the next
+request for the same name.
+"""
+
+import numpy as np
+
+from src.config import BIT_DEPTH
+
+
+class BufferPool:
+    def __init__(self):
+        self._arrays = {}
+        self.allocations = 0  # arrays created or grown
+
+    def get(self, name, n, dtype=BIT_DEPTH):
+        """Uninitialized view of n elements of the scratch array name"""
+        arr = self._arrays.get(name)
+        if arr is None or len(arr) < n or arr.dtype != dtype:
+            grow = arr is not None and arr.dtype == dtype
+            arr = np.empty(max(n, 2 * len(arr)) if grow else n, dtype=dtype)
+            self._arrays[name] = arr
+            self.allocations += 1
+        return arr[:n]
+
+    def zeros(self, name, n, dtype=BIT_DEPTH):
+        view = self.get(name, n, dtype)
+        view.fill(0)
+        return view
+
+    def arange(self, n):
+        """0, 1, ..., n-1 as BIT_DEPTH (kept, not recomputed, while it fits)"""
+        arr = self._arrays.get('arange')
+        if arr is None or len(arr) < n:
+            arr = np.arange(max(n, 2 * len(arr)) if arr is not None else n, dtype=BIT_DEPTH)
+            self._arrays['arange'] = arr
+            self.allocations += 1
+        return arr[:n]
+
+    @property
+    def nbytes(self):
+        return sum(arr.nbytes for arr in self._arrays.values())
+
+    def clear(self):
+        """Release every array (the next requests allocate again)"""
+        self._arrays = {}
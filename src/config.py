@@ -7,6 +7,47 @@ BLOCK_MS = 2.0
 BLOCK_SAMPLES = int(SAMPLE_RATE * BLOCK_MS / 1000)
 BIT_DEPTH = np.float64
 
+# --- QUALITY TIERS ---
+# Selectable per engine (TailSafetyEngine(quality=...)) or per request
+# (speak/stream/render(text, quality=...)) so a loaded host can degrade
+# instead of underrunning.
+#   formants:       number of formant resonators used (F1..F4)
+#   resonator:      'iirpeak' = scipy design every block, 'pole' = closed-form two-pole
+#   control_blocks: BLOCK_MS frames per synthesis block (pitch interpolated per sample)
+#   burst_filter:   band-limit plosive bursts (False = raw soft-clipped pop)
+#   post_chain:     low-pass / DC high-pass / soft clip on every chunk
+# RTF = synthesis time / audio time, measured with benchmark.py on its corpus
+# (lower is faster). The ranges below span repeated runs on one core of a
+# shared Intel Xeon VM (Python 3.11, NumPy 2.4, Numba 0.68); a busy host lands
+# at the top of each range, and other CPUs will differ.
+# Adaptive control rate: control blocks grow up to max_span (in whole
+# control_blocks steps, so block edges stay on the fixed grid) while the tracks
+# drift less than adaptive_tol (relative); silent spans skip to ring-out and
+# zero fill. adaptive_tol 0 = fixed control_blocks rate everywhere.
+QUALITY_TIERS = {
+    # Reference sound. RTF 0.013-0.020
+    'high': {
+        'formants': 4, 'resonator': 'iirpeak', 'control_blocks': 1,
+        'burst_filter': True, 'post_chain': True,
+        'adaptive_tol': 0.01, 'max_span': 8,
+    },
+    # Same formant bank with cheap coefficients at a 4 ms control rate.
+    # Slightly softer bursts on fast speech. RTF 0.010-0.014
+    'balanced': {
+        'formants': 4, 'resonator': 'pole', 'control_blocks': 2,
+        'burst_filter': True, 'post_chain': True,
+        'adaptive_tol': 0.02, 'max_span': 12,
+    },
+    # F4 dropped (duller), 8 ms control rate, unfiltered bursts, no post
+    # chain (audible hiss above 8.5 kHz). Meant for small ARM hosts. RTF 0.007-0.009
+    'fast': {
+        'formants': 3, 'resonator': 'pole', 'control_blocks': 4,
+        'burst_filter': False, 'post_chain': False,
+        'adaptive_tol': 0.04, 'max_span': 16,
+    },
+}
+DEFAULT_QUALITY = 'high'
+
 # --- VOICE PROFILES ---
 # DEPRECATED: Voice profiles are now loaded from Python modules in voices/ folder
 # This dict is kept for reference only and is no longer used by the engine
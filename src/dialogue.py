@@ -0,0 +1,180 @@
+"""
+Dialogue - multi-speaker scripts rendered to one timeline
+Lines are synthesized concurrently on a worker pool (one process per worker by
+default, so voices really run in parallel), then placed on a timeline and
+mixed. The timeline is streamed: as soon as a line is done, everything before
+the next line's start is final and is yielded.
+
+Script items:
+    (speaker, text)               starts right after the previous line
+    (speaker, text, gap)          gap seconds after the previous line ends
+                                  (negative = overlap / interruption)
+    {'speaker': ..., 'text': ..., 'gap': s} or {..., 'start': s}
+                                  start is absolute, in seconds
+Gaps are measured from where the previous line's speech ends: each rendered
+line is trimmed after its last sample above TAIL_LEVEL, dropping the
+end-of-stream and breath silence the engine appends. A line never starts
+before the previous line's start. Speakers map to voice keys through cast
+(default: the speaker is the voice key).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+from src.config import SAMPLE_RATE
+from src.voice_pool import VoicePool
+
+TAIL_LEVEL = 1e-4  # -80 dBFS: quieter trailing samples count as silence
+
+_worker_pool = None  # VoicePool of a worker process
+
+
+def _init_worker(profiles, quality):
+    global _worker_pool
+    _worker_pool = VoicePool(profiles, quality=quality)
+
+
+def _render_in_worker(voice, text, quality, seed):
+    return _worker_pool.engine(voice).render(text, quality=quality, seed=seed)
+
+
+def speech_end(audio, level=TAIL_LEVEL, block=4096):
+    """Index after the last sample of audio louder than level (0 if none), scanning back from the end"""
+    end = len(audio)
+    while end > 0:
+        lo = max(0, end - block)
+        loud = np.flatnonzero(np.abs(audio[lo:end]) > level)
+        if len(loud):
+            return lo + int(loud[-1]) + 1
+        end = lo
+    return 0
+
+
+def parse_script(script, cast=None):
+    """Normalize script items to dicts with speaker, voice, text and start or gap"""
+    lines = []
+    for n, item in enumerate(script):
+        if isinstance(item, dict):
+            line = dict(item)
+            line.setdefault('speaker', line.get('voice'))
+        elif 2 <= len(item) <= 3:
+            line = {'speaker': item[0], 'text': item[1], 'gap': item[2] if len(item) == 3 else 0.0}
+        else:
+            raise ValueError(f"Script line {n}: expected (speaker, text[, gap]) or a dict, got {item!r}")
+        if line.get('speaker') is None or not isinstance(line.get('text'), str):
+            raise ValueError(f"Script line {n}: needs a speaker and a text")
+        if 'start' not in line:
+            line.setdefault('gap', 0.0)
+        line['voice'] = line.get('voice') or (cast or {}).get(line['speaker'], line['speaker'])
+        lines.append(line)
+    return lines
+
+
+def speakers(lines):
+    """Speakers in order of first appearance (= channel order of a multichannel mix)"""
+    return list(dict.fromkeys(line['speaker'] for line in lines))
+
+
+class DialogueRenderer:
+    def __init__(self, pool, max_workers=None, processes=True):
+        """
+        Args:
+            pool: VoicePool holding the voices the scripts use
+            max_workers: Worker count (default: CPU count, at most 6)
+            processes: Render in worker processes (True) or in threads on the
+                       pool's own engines (False; one line per voice at a time)
+        """
+        self.pool = pool
+        self.fs = SAMPLE_RATE
+        self.max_workers = max_workers or min(6, os.cpu_count() or 1)
+        self.processes = processes
+        self._locks = {}
+
+    def _render_local(self, voice, text, quality, seed):
+        with self._locks[voice]:
+            return self.pool.engine(voice).render(text, quality=quality, seed=seed)
+
+    def _executor(self, voices, quality):
+        if self.processes:
+            profiles = {key: dict(self.pool.voices[key]) for key in voices}
+            return ProcessPoolExecutor(self.max_workers, initializer=_init_worker,
+                                       initargs=(profiles, quality or self.pool.quality))
+        for key in voices:
+            self._locks.setdefault(key, threading.Lock())
+        return ThreadPoolExecutor(self.max_workers)
+
+    def stream(self, script, cast=None, channels=False, quality=None, seed=None):
+        """
+        Yield the mixed timeline in pieces as lines finish.
+        Mono pieces are float32 (n,); with channels=True they are (n, speakers)
+        with one channel per speaker in order of first appearance.
+        seed is used for every line (see TailSafetyEngine.render).
+        """
+        lines = parse_script(script, cast)
+        if not lines:
+            return
+        for line in lines:
+            if line['voice'] not in self.pool:
+                raise ValueError(f"Voice '{line['voice']}' (speaker {line['speaker']!r}) is not in the pool")
+        channel = {s: i for i, s in enumerate(speakers(lines))}
+        render = _render_in_worker if self.processes else self._render_local
+        with self._executor({line['voice'] for line in lines}, quality) as ex:
+            futures = [ex.submit(render, line['voice'], line['text'], quality, seed) for line in lines]
+            placed = []  # (start, end, channel, audio)
+            emitted = 0
+            prev_start = prev_end = 0
+            for k, line in enumerate(lines):
+                start = self._line_start(line, prev_start, prev_end)
+                # Everything before this line's start is final
+                if start > emitted:
+                    yield self._mix(placed, emitted, start, len(channel), channels)
+                    emitted = start
+                    placed = [p for p in placed if p[1] > emitted]
+                audio = futures[k].result()
+                audio = audio[:speech_end(audio)]
+                placed.append((start, start + len(audio), channel[line['speaker']], audio))
+                prev_start, prev_end = start, start + len(audio)
+            end = max(p[1] for p in placed) if placed else emitted
+            if end > emitted:
+                yield self._mix(placed, emitted, end, len(channel), channels)
+
+    def render(self, script, cast=None, channels=False, quality=None, seed=None):
+        """Whole timeline as one float32 array (mono, or (n, speakers) with channels=True)"""
+        pieces = list(self.stream(script, cast=cast, channels=channels, quality=quality, seed=seed))
+        if not pieces:
+            n_ch = len(speakers(parse_script(script, cast)))
+            return np.zeros((0, n_ch) if channels else 0, dtype=np.float32)
+        return np.concatenate(pieces)
+
+    def _line_start(self, line, prev_start, prev_end):
+        if 'start' in line:
+            start = int(round(line['start'] * self.fs))
+        else:
+            start = prev_end + int(round(line['gap'] * self.fs))
+        return max(start, prev_start, 0)
+
+    def _mix(self, placed, a, b, n_ch, channels):
+        """
+        Mix timeline samples [a, b): lines are added per speaker channel, then the
+        mono mixdown is one vectorized sum over channels, scaled by 1/sqrt(number
+        of lines sounding) so overlaps keep about the same loudness; the rare
+        peaks that still exceed full scale are clipped.
+        """
+        buf = np.zeros((n_ch, b - a), dtype=np.float32)
+        active = np.zeros(b - a, dtype=np.float32)
+        for start, end, ch, audio in placed:
+            lo, hi = max(start, a), min(end, b)
+            if lo < hi:
+                buf[ch, lo - a:hi - a] += audio[lo - start:hi - start]
+                active[lo - a:hi - a] += 1
+        if channels:
+            return np.ascontiguousarray(buf.T)
+        mix = buf.sum(axis=0)
+        overlap = active > 1
+        if overlap.any():
+            mix[overlap] /= np.sqrt(active[overlap])
+            np.clip(mix, -1.0, 1.0, out=mix)
+        return mix
@@ -0,0 +1,208 @@
+"""
+Encoders - output formats for render/stream
+Converts post-processed float32 chunks to 16-bit PCM (clip + TPDF dither) or
+G.711 µ-law / A-law at 8 kHz. G.711 is table driven: a chunk is quantized to
+int16 once and each code is one lookup in a 64K-entry table. All work happens
+in per-encoder scratch buffers and the result is written straight into the
+caller's buffer when one is given.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import scipy.signal as signal
+
+from src.config import SAMPLE_RATE
+
+# format -> (numpy dtype of one encoded sample, default output rate; None = engine rate)
+FORMATS = {
+    'float32': (np.dtype(np.float32), None),
+    'pcm16': (np.dtype('<i2'), None),
+    'ulaw': (np.dtype(np.uint8), 8000),
+    'alaw': (np.dtype(np.uint8), 8000),
+}
+
+ULAW_BIAS = 0x84
+ULAW_CLIP = 32635
+ALAW_SEG_END = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+
+
+def _ulaw_encode_table():
+    x = np.arange(-32768, 32768, dtype=np.int32)
+    sign = np.where(x < 0, 0x80, 0)
+    mag = np.minimum(np.abs(x), ULAW_CLIP) + ULAW_BIAS
+    exponent = np.frexp((mag >> 7).astype(np.float64))[1] - 1
+    mantissa = (mag >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+def _alaw_encode_table():
+    x = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    mask = np.where(x >= 0, 0xD5, 0x55)
+    mag = np.where(x >= 0, x, -x - 1)
+    seg = np.searchsorted(ALAW_SEG_END, mag, side='left')
+    aval = (np.minimum(seg, 7) << 4) | np.where(seg < 2, mag >> 1, mag >> np.maximum(seg, 1)) & 0x0F
+    aval = np.where(seg >= 8, 0x7F, aval)
+    return ((aval ^ mask) & 0xFF).astype(np.uint8)
+
+
+def _ulaw_decode_table():
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    t = (((u & 0x0F) << 3) + ULAW_BIAS) << ((u & 0x70) >> 4)
+    return np.where(u & 0x80, ULAW_BIAS - t, t - ULAW_BIAS).astype(np.int16)
+
+
+def _alaw_decode_table():
+    a = np.arange(256, dtype=np.int32) ^ 0x55
+    seg = (a & 0x70) >> 4
+    t = (a & 0x0F) << 4
+    t = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+    return np.where(a & 0x80, t, -t).astype(np.int16)
+
+
+# Indexed by the int16 sample reinterpreted as uint16
+ULAW_ENCODE = np.roll(_ulaw_encode_table(), -32768)
+ALAW_ENCODE = np.roll(_alaw_encode_table(), -32768)
+# Indexed by the 8-bit code
+ULAW_DECODE = _ulaw_decode_table()
+ALAW_DECODE = _alaw_decode_table()
+for _t in (ULAW_ENCODE, ALAW_ENCODE, ULAW_DECODE, ALAW_DECODE):
+    _t.flags.writeable = False
+
+
+def decode(data, fmt):
+    """Encoded samples (array or bytes) back to float32 in [-1, 1], for checks and tests"""
+    dtype = FORMATS[fmt][0]
+    data = np.frombuffer(data, dtype=dtype) if not isinstance(data, np.ndarray) else data
+    if fmt == 'float32':
+        return data.astype(np.float32)
+    if fmt == 'pcm16':
+        return data.astype(np.float32) / 32768.0
+    table = ULAW_DECODE if fmt == 'ulaw' else ALAW_DECODE
+    return table[data].astype(np.float32) / 32768.0
+
+
+def output_view(out, dtype, count, offset=0):
+    """
+    View of count samples of dtype in a caller buffer (ndarray, bytearray,
+    memoryview...), starting offset samples in. Raises ValueError if it does not fit.
+    """
+    if isinstance(out, np.ndarray):
+        if not out.flags.c_contiguous or not out.flags.writeable:
+            raise ValueError("output buffer must be a writable C-contiguous array")
+        raw = out.reshape(-1).view(np.uint8)
+    else:
+        raw = np.frombuffer(out, dtype=np.uint8)
+        if raw.flags.writeable is False:
+            raise ValueError("output buffer is read-only")
+    start = offset * dtype.itemsize
+    stop = start + count * dtype.itemsize
+    if stop > raw.nbytes:
+        raise ValueError(f"output buffer too small: need {stop} bytes, have {raw.nbytes}")
+    return raw[start:stop].view(dtype)
+
+
+class Encoder:
+    def __init__(self, fmt='pcm16', sample_rate=SAMPLE_RATE, out_rate=None, dither=True, seed=None):
+        """
+        Args:
+            fmt: One of FORMATS ('float32', 'pcm16', 'ulaw', 'alaw')
+            sample_rate: Rate of the incoming float chunks
+            out_rate: Output rate; defaults to 8000 for G.711 and sample_rate otherwise.
+                      Must divide sample_rate (decimation is an integer polyphase FIR)
+            dither: Add TPDF dither (±1 LSB) before rounding to 16 bits
+            seed: Seed for the dither noise, so seeded renders stay reproducible
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}'. Choose from: {', '.join(FORMATS)}")
+        self.fmt = fmt
+        self.dtype, default_rate = FORMATS[fmt]
+        self.sample_rate = sample_rate
+        self.out_rate = out_rate or default_rate or sample_rate
+        if sample_rate % self.out_rate:
+            raise ValueError(f"out_rate {self.out_rate} must divide the sample rate {sample_rate}")
+        self.factor = sample_rate // self.out_rate
+        self.dither = dither and fmt != 'float32'
+        self.rng = np.random.default_rng(seed)
+        self._table = {'ulaw': ULAW_ENCODE, 'alaw': ALAW_ENCODE}.get(fmt)
+        if self.factor > 1:
+            # Anti-alias lowpass a little under the new Nyquist (3.6 kHz for 8 kHz out)
+            taps = signal.firwin(20 * self.factor + 1, 0.45 * self.out_rate, fs=sample_rate)
+            self._taps = np.ascontiguousarray(taps[::-1], dtype=np.float32)
+            self._history = len(taps) - 1
+            self._window = np.zeros(self._history, dtype=np.float32)  # filter history, then the current chunk
+            self._phase = 0
+        self._scratch = np.zeros(0, dtype=np.float32)
+        self._noise = np.zeros(0, dtype=np.float32)
+        self._pcm = np.zeros(0, dtype=np.int16)
+
+    def reset(self):
+        """Forget resampler history (call between unrelated utterances)"""
+        if self.factor > 1:
+            self._window[:self._history] = 0
+            self._phase = 0
+
+    def output_length(self, n):
+        """Number of encoded samples the next encode() of n input samples produces"""
+        if self.factor == 1:
+            return n
+        return max(0, (n - self._phase + self.factor - 1) // self.factor)
+
+    def _grow(self, n):
+        if len(self._scratch) < n:
+            self._scratch = np.zeros(n, dtype=np.float32)
+            self._noise = np.zeros(n, dtype=np.float32)
+            self._pcm = np.zeros(n, dtype=np.int16)
+
+    def _decimate(self, chunk):
+        h = self._history
+        if len(self._window) < h + len(chunk):
+            window = np.zeros(h + len(chunk), dtype=np.float32)
+            window[:h] = self._window[:h]
+            self._window = window
+        x = self._window[:h + len(chunk)]
+        x[h:] = chunk
+        windows = len(x) - len(self._taps) + 1
+        n = max(0, (windows - self._phase + self.factor - 1) // self.factor)
+        self._grow(n)
+        y = self._scratch[:n]
+        if n:
+            np.matmul(sliding_window_view(x, len(self._taps))[self._phase::self.factor], self._taps, out=y)
+        self._phase += n * self.factor - windows
+        x[:h] = x[len(x) - h:]  # keep the last taps-1 samples for the next chunk
+        return y
+
+    def encode(self, chunk, out=None, offset=0):
+        """
+        Encode one float chunk. With out, the samples are written into the caller's
+        buffer at sample offset and a view of them is returned; otherwise into a new
+        array. Chunks must be fed in order (resampler and dither are stateful).
+        """
+        if self.factor > 1:
+            y = self._decimate(chunk)
+        else:
+            self._grow(len(chunk))
+            y = self._scratch[:len(chunk)]
+            np.copyto(y, chunk, casting='same_kind')
+        n = len(y)
+        dest = output_view(out, self.dtype, n, offset) if out is not None else np.empty(n, dtype=self.dtype)
+        if self.fmt == 'float32':
+            np.copyto(dest, y)
+            return dest
+
+        # Scale, dither, round and clip in scratch, then one cast to int16
+        y *= 32767.0
+        if self.dither:
+            noise = self._noise[:n]
+            self.rng.random(n, dtype=np.float32, out=noise)
+            y += noise
+            self.rng.random(n, dtype=np.float32, out=noise)
+            y -= noise
+        np.rint(y, out=y)
+        np.clip(y, -32768.0, 32767.0, out=y)
+        if self._table is None:
+            np.copyto(dest, y, casting='unsafe')
+            return dest
+        pcm = self._pcm[:n]
+        np.copyto(pcm, y, casting='unsafe')
+        np.take(self._table, pcm.view(np.uint16), out=dest)
+        return dest
@@ -2,16 +2,32 @@
 import numpy as np
 import scipy.signal as signal
 import scipy.ndimage as ndimage
-import sounddevice as sd
 import re
 import math
+import json
 import random
+import hashlib
+import time
+from contextlib import nullcontext
+from functools import lru_cache
 
 from src.config import (
     SAMPLE_RATE, BLOCK_MS, BLOCK_SAMPLES, BIT_DEPTH,
-    PHONEMES, DIPHTHONG_MAP, PLOSIVE_DATA
+    PHONEMES, DIPHTHONG_MAP, PLOSIVE_DATA, QUALITY_TIERS, DEFAULT_QUALITY
 )
 from src.g2p import MultiLingualG2P
+from src.render_cache import make_key
+from src.encoders import Encoder, FORMATS, output_view
+from src.realtime import RealtimePlayer
+from src.buffer_pool import BufferPool
+from src.phonemes import (
+    STREAM_DTYPE, FLAG_SLOW, TYPE_MARKER, TYPE_VOWEL, TYPE_STOP, TYPE_GLIDE,
+    PHONEME_DUR, PHONEME_FORMANTS, PHONEME_AMP, PHONEME_TYPE, PHONEME_AV, PHONEME_AF, PHONEME_MIX,
+    GLIDE_START, GLIDE_END, PLOSIVE_CL_MS, PLOSIVE_BURST, PLOSIVE_VB, PLOSIVE_LOC_F2,
+    PLOSIVE_LOC_F3, PLOSIVE_ASP_MS, PLOSIVE_ASP_MIX, MANDATORY_BREAK,
+    PAUSE_ID, BREATH_ID, END_OF_STREAM_ID, WORD_BOUNDARY_ID, HH_ID, W_ID,
+    phoneme_id, make_stream, encode_stream
+)
 
 # Try to import Cython-compiled synthesis functions (if available)
 try:
@@ -27,34 +43,363 @@ except ImportError:
 try:
     from src.synthesis_numba import (
         generate_formant_waves_jit, apply_exponential_envelope_jit,
-        fast_iir_filter_jit, apply_noise_gate_jit, normalize_audio_jit
+        fast_iir_filter_jit, apply_noise_gate_jit, normalize_audio_jit,
+        synth_blocks_batch_jit, fricative_blocks_jit, lfilter_rows_jit, lfilter_flush_segments_jit,
+        lfilter_into_jit
     )
     NUMBA_AVAILABLE = True
 except ImportError:
     NUMBA_AVAILABLE = False
 
+# Text front end: characters kept by the cleaner, and clause punctuation
+CLEAN_RE = re.compile(r'[^\w\s\.,!?;:\u0301\u0400-\u04FF\u0600-\u06FF]')
+SPLIT_RE = re.compile(r'([.,!?;:])')
+TAIL_RE = re.compile(r'(.*\s)(\S*)$', re.S)
+
+# Column order of the per-frame control matrix built by generate_tracks
+TRACK_KEYS = ['f1','f2','f3','f4','pitch','AV','AF','mix_s','mix_mid','mix_h','burst']
+
+# Klatt-style formant bank
+BW = [60.0, 90.0, 130.0, 180.0]  # Slightly wider bandwidths for Klatt
+Gains = [1.0, 0.7, 0.5, 0.2]     # More classic Klatt gain ratios
+TILT_B = np.ones(1)              # numerator of the spectral tilt filter
+# Resonator states below this are flushed to zero between blocks; a silent
+# resonator otherwise decays into denormals, which are very slow to compute
+DENORMAL_FLOOR = 1e-30
+# Adaptive control rate: frames quieter than SILENT_AMP (and without frication
+# or bursts) are silent; a resonator ringing out below RING_FLOOR (-140 dB) is cut
+SILENT_AMP = 1e-6
+RING_FLOOR = 1e-7
+# Tracks compared by plan_blocks, with the smallest value each is measured against
+DRIFT_KEYS = ['f1','f2','f3','f4','pitch','AV','AF','mix_s','mix_mid','mix_h']
+DRIFT_FLOOR = np.array([100.0, 100.0, 100.0, 100.0, 50.0, 0.01, 0.01, 0.1, 0.1, 0.1])
+
+def resolve_quality(quality):
+    """Return the QUALITY_TIERS entry for a tier name (None = DEFAULT_QUALITY)"""
+    if quality is None:
+        quality = DEFAULT_QUALITY
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality tier '{quality}'. Choose from: {', '.join(QUALITY_TIERS)}")
+    return QUALITY_TIERS[quality]
+
+
+def resonator_coeffs(freqs, fs, use_pole):
+    """
+    Vectorized formant coefficients: freqs (..., F) in Hz, already clamped.
+    Returns b, a of shape (..., F, 3), identical to iirpeak / pole_resonator per element.
+    """
+    bw = np.array(BW[:freqs.shape[-1]])
+    b = np.zeros(freqs.shape + (3,))
+    a = np.ones(freqs.shape + (3,))
+    if use_pole:
+        r = np.exp(-np.pi * bw / fs)
+        g = (1.0 - r * r) * 0.5
+        b[..., 0] = g; b[..., 2] = -g
+        a[..., 1] = -2.0 * r * np.cos(2.0 * np.pi * freqs / fs)
+        a[..., 2] = r * r
+    else:
+        # Same steps as scipy.signal.iirpeak with Q = center_freq / bandwidth
+        Q = np.maximum(0.1, freqs / bw)
+        w0 = 2 * freqs / fs
+        beta = np.tan((w0 / Q) * np.pi / 2.0)
+        gain = 1.0 / (1.0 + beta)
+        b[..., 0] = 1.0 - gain; b[..., 2] = -(1.0 - gain)
+        a[..., 1] = -2.0 * gain * np.cos(w0 * np.pi)
+        a[..., 2] = 2.0 * gain - 1.0
+    return b, a
+
+
+def lfilter_into(b, a, x, zi, out):
+    """
+    signal.lfilter(b, a, x, zi=zi) with y written into out (which may be x) and
+    zi updated in place. Allocation-free through the Numba kernel when available.
+    """
+    if NUMBA_AVAILABLE and a[0] == 1.0:
+        lfilter_into_jit(b, a, x, zi, out)
+    else:
+        out[:], zi[:] = signal.lfilter(b, a, x, zi=zi)
+    return out
+
+
+def peak(x):
+    """np.abs(x).max() without the temporary"""
+    return max(x.max(), -x.min())
+
+
+def signal_end(x, block=1024):
+    """Index after the last nonzero sample of x (0 if all zero), scanning back from the end"""
+    end = len(x)
+    while end > 0:
+        lo = max(0, end - block)
+        if x[lo:end].any():
+            return lo + int(np.flatnonzero(x[lo:end])[-1]) + 1
+        end = lo
+    return 0
+
+
+def lfilter_flush(b, a, x, block=1024, out=None):
+    """
+    signal.lfilter from rest, with a trailing run of exact zeros treated as silence:
+    the filter rings out until its state drops below DENORMAL_FLOOR and the rest
+    stays zero, instead of grinding through denormals.
+    With out (which may be x itself) y is written there instead of a new array.
+    """
+    end = signal_end(x, block)
+    y = np.zeros(len(x)) if out is None else out[:len(x)]
+    zi = np.zeros(max(len(a), len(b)) - 1)
+    if end:
+        lfilter_into(b, a, x[:end], zi, y[:end])
+    y[end:] = 0.0
+    pos = end
+    while pos < len(x) and peak(zi) >= DENORMAL_FLOOR:
+        n = min(block, len(x) - pos)
+        lfilter_into(b, a, y[pos:pos+n], zi, y[pos:pos+n])  # zero input, filtered in place
+        pos += n
+    return y
+
+
+def ring_out(b, a, zi, n, block=1024, out=None):
+    """
+    Zero-input response of a filter from state zi for n samples. Stops once the
+    state is below RING_FLOOR; the rest stays zero. Returns y (written into out
+    if given) and the final state; zi is updated in place.
+    """
+    y = np.zeros(n) if out is None else out[:n]
+    y[:] = 0.0
+    pos = 0
+    while pos < n and peak(zi) >= RING_FLOOR:
+        k = min(block, n - pos)
+        lfilter_into(b, a, y[pos:pos+k], zi, y[pos:pos+k])
+        pos += k
+    if peak(zi) < RING_FLOOR:
+        zi[:] = 0.0
+    return y, zi
+
+
+def linspace_into(out, start, stop, ramp):
+    """
+    np.linspace(start, stop, len(out)) written into out, with the same arithmetic
+    (so bit-identical); ramp holds 0, 1, 2, ... (at least len(out) values).
+    """
+    num = len(out)
+    div = num - 1
+    delta = stop - start
+    if div > 0:
+        step = delta / div
+        if step == 0:
+            np.divide(ramp[:num], div, out=out)
+            out *= delta
+        else:
+            np.multiply(ramp[:num], step, out=out)
+    else:
+        np.multiply(ramp[:num], delta, out=out)
+    out += start
+    if num > 1:
+        out[-1] = stop
+    return out
+
+
+def silent_frames(tracks):
+    """Frames with no voicing, frication or burst"""
+    return (tracks['AV'] < SILENT_AMP) & (tracks['AF'] <= 0.01) & (tracks['burst'] <= 100)
+
+
+def block_increments(inc, pitch, b0, b1, step, ramp):
+    """
+    Per-sample pitch (Hz) of control block [b0, b1) written into inc, interpolated
+    across the block; a long adaptive block keeps the pitch steps of its
+    step-sized pieces. ramp holds 0, 1, 2, ... (see linspace_into).
+    """
+    if b1 - b0 <= step:
+        linspace_into(inc, pitch[b0], pitch[b1-1], ramp)
+    elif step == 1:
+        inc.reshape(-1, BLOCK_SAMPLES)[:] = pitch[b0:b1, None]
+    else:
+        for s0 in range(b0, b1, step):
+            s1 = min(s0+step, b1)
+            linspace_into(inc[(s0-b0)*BLOCK_SAMPLES:(s1-b0)*BLOCK_SAMPLES], pitch[s0], pitch[s1-1], ramp)
+    return inc
+
+
+def plan_blocks(tracks, step, tol=0.0, max_span=1):
+    """
+    Control blocks for synthesize(), as (first frame, end frame, silent).
+    With tol 0 every block is step frames. Otherwise blocks are unions of those
+    step-frame grid blocks, so every block boundary stays on the fixed grid: a
+    run of silent grid blocks (no voicing, frication or burst in any frame) is
+    one block, and elsewhere a block grows by whole grid blocks up to max_span
+    frames while every DRIFT_KEYS track stays within tol (relative) of the
+    block's first frame.
+    """
+    _, b0, b1, silent = plan_blocks_batch(tracks, [0, len(tracks['pitch'])], step, tol, max_span)
+    return list(zip(b0.tolist(), b1.tolist(), silent.tolist()))
+
+
+def plan_blocks_batch(tracks, bounds, step, tol=0.0, max_span=1):
+    """
+    plan_blocks() for many chunks at once: tracks holds them back to back, chunk
+    c being frames bounds[c]:bounds[c+1]. Each chunk has its own grid and no
+    block crosses a bound. Where a block starting at each grid block would end
+    is worked out for all of them with array operations; the blocks actually
+    used are the chain of those ends from the first grid block, found by
+    pointer doubling.
+    Returns the arrays (chunk, first frame, end frame, silent), in frame order.
+    """
+    bounds = np.asarray(bounds)
+    lo, hi = bounds[:-1], bounds[1:]
+    counts = -(-(hi - lo) // step)  # grid blocks per chunk
+    first = np.concatenate([[0], np.cumsum(counts)])  # first grid block of each chunk
+    G = int(first[-1])
+    chunk = np.repeat(np.arange(len(lo)), counts)
+    g_start = lo[chunk] + (np.arange(G) - first[chunk]) * step
+    g_end = np.minimum(g_start + step, hi[chunk])
+    if tol <= 0 or G == 0:
+        return chunk, g_start, g_end, np.zeros(G, dtype=bool)
+    quiet = np.logical_and.reduceat(silent_frames(tracks), g_start)
+    chunk_end = first[chunk + 1]
+    # A silent block runs up to the next sounding grid block of its chunk
+    sounding = np.where(quiet, G, np.arange(G))
+    nxt = np.minimum(np.minimum.accumulate(sounding[::-1])[::-1], chunk_end)
+    # A sounding one takes the following grid blocks while they stay within tol
+    g = np.flatnonzero(~quiet)
+    nxt[g] = g + 1
+    grow = max(1, max_span // step)
+    if len(g) and grow > 1:
+        h = g[:, None] + np.arange(1, grow)
+        valid = h < np.minimum(g + grow, chunk_end[g])[:, None]
+        h = np.minimum(h, G - 1)
+        frames = g_start[h][..., None] + np.arange(step)
+        ok = frames >= g_end[h][..., None]  # past a short last grid block
+        frames = np.minimum(frames, hi[-1] - 1)
+        ref = g_start[g]
+        drift = np.ones(frames.shape, dtype=bool)
+        for key, floor in zip(DRIFT_KEYS, DRIFT_FLOOR):
+            track = tracks[key]
+            drift &= np.abs(track[frames] - track[ref][:, None, None]) <= (tol * np.maximum(np.abs(track[ref]), floor))[:, None, None]
+        ok = (drift | ok).all(axis=2) & ~quiet[h] & valid
+        nxt[g] += np.argmin(np.pad(ok, ((0, 0), (0, 1))), axis=1)  # up to the first that is not ok
+    # Block starts: everything reachable from grid block 0 by following nxt
+    jump = np.append(nxt, G)
+    used = np.zeros(G + 1, dtype=bool)
+    used[0] = True
+    while True:
+        used[jump[used]] = True
+        if (jump == G).all():
+            break
+        jump = jump[jump]
+    starts = np.flatnonzero(used[:G])
+    return chunk[starts], g_start[starts], g_end[nxt[starts] - 1], quiet[starts]
+
+
+def read_text_chunks(source, chunk_chars=4096):
+    """Yield text from a str, a file-like object (anything with .read) or an iterable of str"""
+    if isinstance(source, str):
+        for i in range(0, len(source), chunk_chars):
+            yield source[i:i+chunk_chars]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_chars)
+            if not chunk: break
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+def chunk_rng(seed, index):
+    """Generator for chunk `index` of a seeded render; independent of the order chunks are made in"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def pole_resonator(freq, bw, fs):
+    """Closed-form two-pole resonator with unity peak gain (cheap stand-in for iirpeak)"""
+    r = math.exp(-math.pi * bw / fs)
+    g = (1.0 - r * r) * 0.5
+    return [g, 0.0, -g], [1.0, -2.0 * r * math.cos(2.0 * math.pi * freq / fs), r * r]
+
+
+@lru_cache(maxsize=256)
+def butter_cached(order, wn, btype, fs):
+    """Butterworth design shared by all engines; only for fixed or table-driven cutoffs"""
+    return signal.butter(order, wn, btype, fs=fs)
+
+
+def band_coeffs(lows, highs, fs):
+    """butter_cached(2, (low, high), 'band', fs) per row, as (b, a) arrays (rows, 5); one design per distinct band"""
+    bands, inverse = np.unique(np.stack([lows, highs], axis=1), axis=0, return_inverse=True)
+    designs = [butter_cached(2, (low, high), 'band', fs) for low, high in bands.tolist()]
+    inverse = inverse.reshape(-1)
+    return np.array([b for b, _ in designs])[inverse], np.array([a for _, a in designs])[inverse]
+
+
+class PreparedVoice:
+    """A validated voice profile plus the constants synthesis derives from it, computed once"""
+
+    REQUIRED_KEYS = ['name', 'base_pitch', 'duration_scale', 'brightness', 'formant_scale', 'noise_level']
+
+    def __init__(self, voice_profile):
+        # Validate required keys (Fix 8)
+        for key in self.REQUIRED_KEYS:
+            if key not in voice_profile:
+                raise ValueError(f"Missing required key '{key}' in voice_profile.")
+        self.profile = voice_profile
+        self.name = voice_profile.get('name', 'unknown')
+        # Identifies the profile contents in render cache keys
+        self.profile_hash = hashlib.sha1(
+            json.dumps(voice_profile, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        self.base_pitch = voice_profile['base_pitch']
+        self.duration_scale = voice_profile['duration_scale']
+        self.formant_scale = voice_profile['formant_scale']
+        # Klatt-style: minimize noise, maximize formant filtering
+        self.noise_level = voice_profile['noise_level'] * 0.5  # Reduce noise for clarity
+        # Spectral tilt for brightness
+        self.tilt_coeff = 0.92 + (voice_profile['brightness'] * 0.05)
+        self.tilt_a = np.array([1.0, -self.tilt_coeff])
+        # Phoneme base durations with the profile's duration scale applied
+        self.durations = PHONEME_DUR * self.duration_scale
+        self.durations.flags.writeable = False
+
+
 class TailSafetyEngine:
-    def __init__(self, voice='default_female', voice_profile=None):
+    def __init__(self, voice='default_female', voice_profile=None, quality=DEFAULT_QUALITY, g2p=None, cache=None,
+                 tracer=None):
         self.fs = SAMPLE_RATE
-        # Require voice profile dict to be passed
+        # Require voice profile dict (or a PreparedVoice) to be passed
         if voice_profile is None:
             raise ValueError("voice_profile dict must be provided")
-        
-        # Validate required keys (Fix 8)
-        required_keys = ['name', 'base_pitch', 'duration_scale', 'brightness', 'formant_scale', 'noise_level']
-        for key in required_keys:
-            if key not in voice_profile:
-                raise ValueError(f"Missing required key '{key}' in voice_profile.")
-                
-        self.voice_profile = voice_profile
-        self.voice_key = voice_profile.get('name', 'unknown')
-        self.base_pitch = self.voice_profile['base_pitch']
-        self.g2p = MultiLingualG2P()
+        self.set_voice(voice_profile)
+        resolve_quality(quality)
+        self.quality = quality
+        self.g2p = g2p if g2p is not None else MultiLingualG2P()
+        self.cache = cache  # optional RenderCache for repeated str prompts
+        self.prompt_packs = []  # PromptPacks checked before synthesizing
+        self.playback_stats = None  # RealtimePlayer.stats() of the last speak()
+        self.tracer = tracer  # optional tracing.Tracer; None = no tracing overhead
+        self.pool = BufferPool()  # DSP scratch reused across blocks and chunks
+        self.rng = np.random.default_rng()  # jitter/noise source, reseeded per request by stream()
         self.reset_filters()
         self.sentence_energy = 1.0
         self.tempo_clock = 0.0
         self.pitch_contour = []  # Track intonation over utterance
 
+    def set_voice(self, voice_profile):
+        """Switch voice; a PreparedVoice is used as is, a dict is validated and prepared"""
+        if not isinstance(voice_profile, PreparedVoice):
+            voice_profile = PreparedVoice(voice_profile)
+        self.voice = voice_profile
+        self.voice_profile = voice_profile.profile
+        self.voice_key = voice_profile.name
+        self.base_pitch = voice_profile.base_pitch
+
+    def attach_pack(self, pack):
+        """Serve phrases found in a PromptPack straight from the pack (must match this voice)"""
+        if pack.voice_hash != self.voice.profile_hash:
+            raise ValueError(f"Prompt pack {pack.path} was built for a different voice profile")
+        if pack.sample_rate != self.fs:
+            raise ValueError(f"Prompt pack {pack.path} is {pack.sample_rate} Hz, engine runs at {self.fs} Hz")
+        self.prompt_packs.append(pack)
+
     def reset_filters(self):
         self.zi_f = [np.zeros(2) for _ in range(4)]
         self.zi_tilt = np.zeros(1)
@@ -62,77 +407,116 @@ class TailSafetyEngine:
         self.last_pitch = 125.0
         self.last_f = [500, 1500, 2500, 3500]
         self.sentence_energy = 1.0
+        self.tempo_clock = 0.0
+        self.last_peak = 0.0
 
-    def soft_clip(self, x):
-        return np.tanh(x * 0.95)
+    def soft_clip(self, x, out=None):
+        return np.tanh(np.multiply(x, 0.95, out=out), out=out)
 
     def db_to_lin(self, db):
         if db <= -90: return 0.0
         return 10.0 ** (db / 20.0)
 
+    def _span(self, name, cat='stage', **args):
+        """tracer.span() when tracing, else a no-op context yielding a throwaway args dict"""
+        if self.tracer is None:
+            return nullcontext({})
+        return self.tracer.span(name, cat, **args)
+
+    def iter_phonemes(self, source, chunk_chars=4096):
+        """
+        Lazily convert text to compact phoneme stream pieces, one per clause.
+        source may be a str, a file-like object or an iterable of str; text is
+        cleaned, tokenized and run through G2P incrementally, so memory stays
+        bounded regardless of document size.
+        """
+        ready = []
+        in_words = False       # inside a run of words between punctuation
+        words_pending = False  # words emitted since the last pause
+
+        def add_words(words):
+            nonlocal in_words, words_pending
+            if not words: return
+            if not in_words:
+                if words_pending: ready.append((PAUSE_ID, 45, 0, 0))
+                in_words = True
+            with self._span('g2p', words=len(words)):
+                prons = self.g2p.predict_batch(words)
+            for pron, is_slow in prons:
+                flags = FLAG_SLOW if is_slow else 0
+                for p in pron:
+                    s = 0
+                    # Handle stress marker (single digit at the end)
+                    if p and p[-1].isdigit(): 
+                        s = int(p[-1])
+                        p = p[:-1] # Remove the last character (the digit)
+                    ready.append((phoneme_id(p), 0, s, flags))
+                ready.append((WORD_BOUNDARY_ID, 0, 0, 0))
+                words_pending = True
+
+        pending = ''
+        for chunk in read_text_chunks(source, chunk_chars):
+            # Keep semicolon for splitting, but allow it in the clean_text regex
+            pending += CLEAN_RE.sub('', chunk)
+            parts = SPLIT_RE.split(pending)
+            pending = parts.pop()  # text after the last punctuation may continue in the next chunk
+            for j, t in enumerate(parts):
+                if j % 2 == 0:
+                    add_words(t.split())
+                    continue
+                in_words = False
+                if t in ['.',',','!','?']:
+                    if words_pending:
+                        ready.append((PAUSE_ID, 45, 0, 0)); words_pending = False
+                    ms = 200 if t==',' else 450
+                    ready.append((PAUSE_ID, ms, 0, 0))
+                    if t in ['.','!','?']:
+                        ready.append((BREATH_ID, 600, 0, 0))
+                    yield make_stream(ready)
+                    ready = []
+                else:
+                    add_words([t]); in_words = False
+            # Words followed by whitespace are complete; keep a trailing partial word
+            m = TAIL_RE.match(pending)
+            if m:
+                add_words(m.group(1).split())
+                pending = m.group(2)
+        add_words(pending.split())
+        ready.append((END_OF_STREAM_ID, 3000, 0, 0))
+        yield make_stream(ready)
+
     def parse_text(self, text):
-        # Keep semicolon for splitting, but allow it in the clean_text regex
-        clean_text = re.sub(r'[^\w\s\.,!?;:\u0400-\u04FF\u0600-\u06FF]', '', text)
-        tokens = re.split(r'([.,!?;:])', clean_text)
-        full_stream = []
-        temp_word_buffer = []
-        sentence_counter = 0
-        
-        for t in tokens:
-            if not t.strip(): continue
-            if t in ['.',',','!','?']:
-                if temp_word_buffer:
-                    full_stream.extend(temp_word_buffer); full_stream.append(('PAUSE', 45, 0))
-                    temp_word_buffer = []
-                ms = 200 if t==',' else 450
-                full_stream.append(('PAUSE', ms, 0))
-                if t in ['.','!','?']:
-                    sentence_counter += 1
-                    full_stream.append(('BREATH', 600, 0))
-            else:
-                if temp_word_buffer:
-                    full_stream.extend(temp_word_buffer); full_stream.append(('PAUSE', 45, 0))
-                    temp_word_buffer = []
-                words = t.split()
-                for w in words:
-                    pron, is_slow = self.g2p.predict(w)
-                    for p in pron:
-                        s = 0
-                        # Handle stress marker (single digit at the end)
-                        if p and p[-1].isdigit(): 
-                            s = int(p[-1])
-                            p = p[:-1] # Remove the last character (the digit)
-                        if p == 'HH': p = 'HH'
-                        temp_word_buffer.append((p, 0, s, is_slow))
-                    temp_word_buffer.append(('WORD_BOUNDARY', 0, 0))
-        if temp_word_buffer: full_stream.extend(temp_word_buffer)
-        full_stream.append(('END_OF_STREAM', 3000, 0))
-        return full_stream
+        """Convert text to a compact phoneme stream (structured array of STREAM_DTYPE)"""
+        return np.concatenate(list(self.iter_phonemes(text)))
 
     def generate_tracks(self, stream_segment):
-        tracks = {k: [] for k in ['f1','f2','f3','f4','pitch','AV','AF','mix_s','mix_mid','mix_h','burst']}
+        if not isinstance(stream_segment, np.ndarray):
+            stream_segment = encode_stream(stream_segment)
+        ids = stream_segment['id'].tolist()
+        durs = stream_segment['dur'].tolist()
+        stresses = stream_segment['stress'].tolist()
+        flags = stream_segment['flags'].tolist()
+        durations = self.voice.durations
+        duration_scale = self.voice.duration_scale
+        segments = []  # one (frames, len(TRACK_KEYS)) block per phoneme
+        seg_ids = []   # phoneme id of each segment
         
-        for i, item in enumerate(stream_segment):
-            ph = item[0]
-            if ph == 'BREATH' or ph == 'END_OF_STREAM': self.sentence_energy = 1.0 
+        for i, pid in enumerate(ids):
+            if pid == BREATH_ID or pid == END_OF_STREAM_ID: self.sentence_energy = 1.0 
             
-            if ph == 'END_OF_STREAM':
-                dur = item[1]; n = int(dur / BLOCK_MS)
-                for _ in range(n):
-                    tracks['f1'].append(self.last_f[0]); tracks['f2'].append(self.last_f[1])
-                    tracks['f3'].append(self.last_f[2]); tracks['f4'].append(self.last_f[3])
-                    tracks['pitch'].append(self.last_pitch)
-                    tracks['AV'].append(0.0); tracks['AF'].append(0.0)
-                    for k in ['mix_s','mix_mid','mix_h','burst']: tracks[k].append(0)
+            if pid == END_OF_STREAM_ID:
+                seg = np.zeros((int(durs[i] / BLOCK_MS), len(TRACK_KEYS)))
+                seg[:, 0:4] = self.last_f
+                seg[:, 4] = self.last_pitch
+                segments.append(seg); seg_ids.append(pid)
                 continue
 
-            if ph == 'WORD_BOUNDARY': continue 
-            if ph not in PHONEMES: continue
+            p_type = PHONEME_TYPE[pid]
+            if p_type == TYPE_MARKER: continue
             
-            dur_ov = item[1]
-            stress = item[2]
-            is_slow_lang = False
-            if len(item) > 3: is_slow_lang = item[3]
+            dur_ov = durs[i]
+            stress = stresses[i]
+            is_slow_lang = flags[i] & FLAG_SLOW
             
             # Prosody - improved pitch contours and stress
             self.sentence_energy *= 0.97  # Slightly slower decay
@@ -144,7 +528,7 @@ class TailSafetyEngine:
                 pitch_offset += 25.0  # Higher rise for stressed syllables
             else:
                 pitch_offset -= 8.0   # Lower for unstressed
-            pitch_offset += np.random.uniform(-2, 2)  # Reduce jitter
+            pitch_offset += self.rng.uniform(-2, 2)  # Reduce jitter
             target_note = self.base_pitch + pitch_offset
             if target_note > self.base_pitch + 55: target_note = self.base_pitch + 55
             if target_note < 75: target_note = 75
@@ -152,226 +536,591 @@ class TailSafetyEngine:
             self.tempo_clock += 0.1
             tempo_var = math.sin(self.tempo_clock) * 0.12  # Reduce tempo variation
             
-            p_data = PHONEMES[ph]
-            base_dur = p_data[0]
-            
-            # Apply duration scaling from voice profile
-            duration_scale = self.voice_profile['duration_scale']
+            # Base durations already carry the voice profile duration scale
+            base_dur = durations[pid]
             
             if stress: 
                 base_dur *= 1.25
             if is_slow_lang: 
                 base_dur *= 1.35 
-            if ph in ['PAUSE', 'BREATH']: 
-                base_dur = dur_ov
+            if pid == PAUSE_ID or pid == BREATH_ID: 
+                base_dur = dur_ov * duration_scale
             else:
                 base_dur *= (1.0 + tempo_var)
                 if not stress and self.sentence_energy > 0.8: 
                     base_dur *= 0.92
-            
-            # Apply voice profile duration scale
-            base_dur *= duration_scale
 
-            tgt_f = p_data[1:5]
-            tgt_amp = self.db_to_lin(p_data[5])
-            
-            if ph == 'HH' and i + 1 < len(stream_segment):
-                n_ph = stream_segment[i+1][0]
-                if n_ph in PHONEMES and PHONEMES[n_ph][6] in [0, 5]: tgt_f = PHONEMES[n_ph][1:5]
+            tgt_f = PHONEME_FORMANTS[pid]
+            if pid == HH_ID and i + 1 < len(ids):
+                n_id = ids[i+1]
+                if PHONEME_TYPE[n_id] in (TYPE_VOWEL, TYPE_GLIDE): tgt_f = PHONEME_FORMANTS[n_id]
 
             n = max(1, int(base_dur / BLOCK_MS))
             
             # Synthesis Logic
-            if p_data[6] == 5: # Glides
-                if ph in DIPHTHONG_MAP:
-                    s_ph, e_ph = DIPHTHONG_MAP[ph]
-                    start_f = PHONEMES[s_ph][1:5]; end_f = PHONEMES[e_ph][1:5]
-                elif ph == 'W': 
-                    start_f = p_data[1:5]; end_f = start_f
-                    if i+1 < len(stream_segment) and stream_segment[i+1][0] in PHONEMES: 
-                        end_f = PHONEMES[stream_segment[i+1][0]][1:5]
-                else: start_f = tgt_f; end_f = tgt_f
-
-                for f in range(n):
-                    k = (1 - np.cos((f/n)*np.pi))/2
-                    curr_f = [start_f[x]+(end_f[x]-start_f[x])*k for x in range(4)]
-                    tracks['f1'].append(curr_f[0]); tracks['f2'].append(curr_f[1])
-                    tracks['f3'].append(curr_f[2]); tracks['f4'].append(curr_f[3])
-                    kp = f / n
-                    syllable_arc = math.sin(kp * math.pi) * 8.0 
-                    curr_p = self.last_pitch + (target_note - self.last_pitch) * kp + syllable_arc
-                    tracks['pitch'].append(curr_p)
-                    tracks['AV'].append(tgt_amp); tracks['AF'].append(0.0)
-                    for k in ['mix_s','mix_mid','mix_h','burst']: tracks[k].append(0)
-                self.last_pitch = target_note; self.last_f = end_f
-
-            elif p_data[6] == 2: # Plosives
-                key = ph if ph in PLOSIVE_DATA else 'T'
-                dat = PLOSIVE_DATA[key]
-                for _ in range(int(dat['cl']/BLOCK_MS)):
-                    tracks['f1'].append(200); tracks['f2'].append(dat['loc_f2']); tracks['f3'].append(dat['loc_f3']); tracks['f4'].append(3500)
-                    tracks['pitch'].append(self.last_pitch); tracks['AV'].append(dat['vb']); tracks['AF'].append(0.0)
-                    for k in ['mix_s','mix_mid','mix_h','burst']: tracks[k].append(0)
-                tracks['f1'].append(500); tracks['f2'].append(dat['loc_f2']); tracks['f3'].append(dat['loc_f3']); tracks['f4'].append(3500)
-                tracks['pitch'].append(self.last_pitch); tracks['AV'].append(dat['vb']); tracks['AF'].append(0.0)
-                for k in ['mix_s','mix_mid','mix_h']: tracks[k].append(0)
-                tracks['burst'].append(dat['burst'])
-                if dat['asp']:
-                    asp_dur = 30 if dat['asp'] != 'SH_HARD' else 120
-                    for _ in range(int(asp_dur/BLOCK_MS)):
-                        tracks['f1'].append(500); tracks['f2'].append(dat['loc_f2']); tracks['f3'].append(dat['loc_f3']); tracks['f4'].append(3500)
-                        tracks['pitch'].append(self.last_pitch); tracks['AV'].append(dat['vb']); tracks['AF'].append(0.9)
-                        ms, mm, mh = 0,0,0
-                        if 'S' in dat['asp']: ms=1
-                        elif 'SH' in dat['asp']: mm=1
-                        else: mh=1
-                        tracks['mix_s'].append(ms); tracks['mix_mid'].append(mm); tracks['mix_h'].append(mh); tracks['burst'].append(0)
-                self.last_f = [500, dat['loc_f2'], dat['loc_f3'], 3500]
+            if p_type == TYPE_GLIDE:
+                start_f = GLIDE_START[pid]; end_f = GLIDE_END[pid]
+                if pid == W_ID and i+1 < len(ids) and PHONEME_TYPE[ids[i+1]] != TYPE_MARKER:
+                    end_f = PHONEME_FORMANTS[ids[i+1]]
+                kp = np.arange(n) / n
+                k = (1 - np.cos(kp*np.pi))/2
+                seg = np.zeros((n, len(TRACK_KEYS)))
+                seg[:, 0:4] = start_f + (end_f - start_f) * k[:, None]
+                syllable_arc = np.sin(kp * np.pi) * 8.0
+                seg[:, 4] = self.last_pitch + (target_note - self.last_pitch) * kp + syllable_arc
+                seg[:, 5] = PHONEME_AMP[pid]
+                self.last_pitch = target_note; self.last_f = list(end_f)
+
+            elif p_type == TYPE_STOP: # Plosives
+                n_cl = int(PLOSIVE_CL_MS[pid]/BLOCK_MS)
+                n_asp = int(PLOSIVE_ASP_MS[pid]/BLOCK_MS)
+                loc = [PLOSIVE_LOC_F2[pid], PLOSIVE_LOC_F3[pid]]
+                seg = np.zeros((n_cl + 1 + n_asp, len(TRACK_KEYS)))
+                seg[:n_cl, 0] = 200; seg[n_cl:, 0] = 500
+                seg[:, 1:3] = loc; seg[:, 3] = 3500
+                seg[:, 4] = self.last_pitch; seg[:, 5] = PLOSIVE_VB[pid]
+                seg[n_cl, 10] = PLOSIVE_BURST[pid]
+                seg[n_cl+1:, 6] = 0.9; seg[n_cl+1:, 7:10] = PLOSIVE_ASP_MIX[pid]
+                self.last_f = [500] + loc + [3500]
 
             else: # Standard
-                av, af = (0.0, 0.0)
-                if p_data[6] in [0, 6]: av = tgt_amp 
-                elif p_data[6] == 1: af = tgt_amp 
-                elif p_data[6] == 4: av = tgt_amp*0.5; af = tgt_amp*0.5
-                ms, mm, mh = 0,0,0
-                if ph in ['S','Z','S_AR']: ms=1
-                elif ph in ['SH','ZH']: mm=1
-                elif ph in ['HH','KH','H_AR']: mh=1
-                if ph in ['F', 'TH']: ms=0; mm=0.5; mh=0.5; af*=0.8
-                if ph in ['Z','Z_AR']: av=tgt_amp*0.8; af=tgt_amp*0.7; ms=1.0
-                if ph == 'V': av=tgt_amp*0.8; af=tgt_amp*0.5; mh=0.5; ms=0.2
-                if ph == 'GH': av=tgt_amp*0.8; af=tgt_amp*0.4; mh=0.8; ms=0.0
-                if ph == 'AIN': av=tgt_amp; af=0.0
-                if ph in ['KH','H_AR']: mm=0.5; af*=0.6
-                
-                for f in range(n):
-                    tracks['f1'].append(tgt_f[0]); tracks['f2'].append(tgt_f[1])
-                    tracks['f3'].append(tgt_f[2]); tracks['f4'].append(tgt_f[3])
-                    kp = f / n
-                    syllable_arc = math.sin(kp * math.pi) * 5.0
-                    curr_p = self.last_pitch + (target_note - self.last_pitch) * kp + syllable_arc
-                    tracks['pitch'].append(curr_p)
-                    tracks['AV'].append(av); tracks['AF'].append(af)
-                    tracks['mix_s'].append(ms); tracks['mix_mid'].append(mm); tracks['mix_h'].append(mh); tracks['burst'].append(0)
+                kp = np.arange(n) / n
+                seg = np.zeros((n, len(TRACK_KEYS)))
+                seg[:, 0:4] = tgt_f
+                syllable_arc = np.sin(kp * np.pi) * 5.0
+                seg[:, 4] = self.last_pitch + (target_note - self.last_pitch) * kp + syllable_arc
+                seg[:, 5] = PHONEME_AV[pid]; seg[:, 6] = PHONEME_AF[pid]
+                seg[:, 7:10] = PHONEME_MIX[pid]
                 self.last_pitch = target_note; self.last_f = list(tgt_f)
+            segments.append(seg); seg_ids.append(pid)
 
-        for k in tracks:
-            arr = np.array(tracks[k], dtype=BIT_DEPTH)
+        frames = np.concatenate(segments) if segments else np.zeros((0, len(TRACK_KEYS)))
+        tracks = {}
+        for c, k in enumerate(TRACK_KEYS):
+            arr = np.ascontiguousarray(frames[:, c], dtype=BIT_DEPTH)
             if len(arr) > 0:
                 if k == 'pitch': tracks[k] = ndimage.gaussian_filter1d(arr, sigma=4)
                 elif k != 'burst': tracks[k] = ndimage.gaussian_filter1d(arr, sigma=2)
                 else: tracks[k] = arr
             else: tracks[k] = arr
+        if self.tracer is not None:
+            # (id, first frame, frames) per phoneme, for per-phoneme spans in synthesize()
+            lengths = np.array([len(seg) for seg in segments], dtype=np.int64)
+            starts = np.cumsum(lengths) - lengths
+            tracks['phonemes'] = np.stack([np.array(seg_ids, dtype=np.int64), starts, lengths], axis=1).reshape(-1, 3)
         return tracks
 
-    def synthesize(self, tracks):
+    def synthesize(self, tracks, quality=None, out=None):
+        """
+        Render control tracks to BIT_DEPTH samples. Scratch arrays come from
+        self.pool and are reused across blocks and chunks, and every DSP step
+        writes into them in place. With out (at least frames * BLOCK_SAMPLES
+        long) the chunk is written there instead of into a new array.
+        """
         if len(tracks['pitch']) == 0: return np.zeros(0)
+        tier = resolve_quality(quality or self.quality)
         n = len(tracks['pitch'])
         total = n * BLOCK_SAMPLES
-        out = np.zeros(total, dtype=BIT_DEPTH)
+        if out is None:
+            out = np.zeros(total, dtype=BIT_DEPTH)
+        else:
+            out = out[:total]
+            out[:] = 0.0
+        pool = self.pool
         phase = self.phase_acc
-        # Klatt-style: minimize noise, maximize formant filtering
-        noise_level = self.voice_profile['noise_level'] * 0.5  # Reduce noise for clarity
-        raw_noise = np.random.normal(0, noise_level, total)
-        BW = [60.0, 90.0, 130.0, 180.0]  # Slightly wider bandwidths for Klatt
-        Gains = [1.0, 0.7, 0.5, 0.2]     # More classic Klatt gain ratios
-
-        for b in range(n):
-            start, end = b*BLOCK_SAMPLES, (b+1)*BLOCK_SAMPLES
-            f_vals = [tracks['f1'][b], tracks['f2'][b], tracks['f3'][b], tracks['f4'][b]]
-            pitch = tracks['pitch'][b]
-            av, af = tracks['AV'][b], tracks['AF'][b]
-            ms, mm, mh = tracks['mix_s'][b], tracks['mix_mid'][b], tracks['mix_h'][b]
-            burst = tracks['burst'][b]
-
-            # Klatt-style voicing source: sawtooth
-            f0 = pitch
-            inc = f0 / self.fs
-            src = np.zeros(BLOCK_SAMPLES)
-            for i in range(BLOCK_SAMPLES):
-                phase += inc
-                if phase >= 1.0: phase -= 1.0
-                src[i] = 2.0 * (phase - 0.5)
+        voice = self.voice
+        # Same draws as rng.normal(0, noise_level, total)
+        raw_noise = self.rng.standard_normal(out=pool.get('noise', total))
+        raw_noise *= voice.noise_level
+        n_formants = tier['formants']
+        use_pole = tier['resonator'] == 'pole'
+        step = tier['control_blocks']
+        # Formant scaling and resonator coefficients, once for the whole chunk
+        scaled = np.maximum(50, np.stack([tracks['f1'], tracks['f2'], tracks['f3'], tracks['f4']], axis=1) / voice.formant_scale)
+        freqs = np.clip(scaled[:, :n_formants], 100, self.fs/2-100)
+        b_all, a_all = resonator_coeffs(freqs, self.fs, use_pole)
+        marks = [] if self.tracer is not None and 'phonemes' in tracks else None  # (first frame, block start time)
+
+        blocks = plan_blocks(tracks, step, tier.get('adaptive_tol', 0.0), tier.get('max_span', step))
+        longest = max(b1 - b0 for b0, b1, _ in blocks) * BLOCK_SAMPLES
+        ramp = pool.arange(longest)
+        inc_buf, ph_buf, src_buf = pool.get('inc', longest), pool.get('phase', longest), pool.get('src', longest)
+        y_buf, tmp_buf, noise_buf = pool.get('y', longest), pool.get('tmp', longest), pool.get('fric', longest)
+        pop = pool.get('pop', BLOCK_SAMPLES)
+        zi_band = pool.get('zi_band', 4)  # order 2 band-pass state, restarted from rest per block
+
+        def add_band(b, a, x, gain, acc):
+            """acc += lfilter(b, a, x) * gain * 0.7, filtering x from rest"""
+            zi_band[:] = 0.0
+            y = lfilter_into(b, a, x, zi_band, tmp_buf[:len(x)])
+            y *= gain
+            y *= 0.7
+            acc += y
+
+        pitch = tracks['pitch']
+        bursts = tracks['burst']
+        for b0, b1, silent in blocks:
+            mid = (b0 + b1 - 1) // 2
+            if marks is not None: marks.append((b0, time.perf_counter()))
+            start, end = b0*BLOCK_SAMPLES, b1*BLOCK_SAMPLES
+            m = end - start
+            seg = out[start:end]
+            av, af = tracks['AV'][mid], tracks['AF'][mid]
+            ms, mm, mh = tracks['mix_s'][mid], tracks['mix_mid'][mid], tracks['mix_h'][mid]
+
+            # Klatt-style voicing source: sawtooth, pitch interpolated across the block
+            inc = block_increments(inc_buf[:m], pitch, b0, b1, step, ramp)
+            inc /= self.fs
+            ph = np.cumsum(inc, out=ph_buf[:m])
+            ph += phase
+            ph -= np.floor(ph, out=tmp_buf[:m])
+            phase = ph[-1]
+            src = np.subtract(ph, 0.5, out=src_buf[:m])
+            src *= 2.0
 
             # Spectral tilt for brightness
-            tilt_coeff = 0.92 + (self.voice_profile['brightness'] * 0.05)
-            src, self.zi_tilt = signal.lfilter([1.0], [1.0, -tilt_coeff], src, zi=self.zi_tilt)
+            lfilter_into(TILT_B, voice.tilt_a, src, self.zi_tilt, src)
+
+            if silent:
+                # No excitation: the formant bank only rings out, then stays at zero
+                for i in range(n_formants):
+                    if self.zi_f[i].any():
+                        y, _ = ring_out(b_all[mid, i], a_all[mid, i], self.zi_f[i], m, out=y_buf)
+                        y *= Gains[i]
+                        seg += y
+                continue
             src *= av * 0.18
 
-            # Formant scaling
-            formant_scale = self.voice_profile['formant_scale']
-            scaled_f = [max(50, f_vals[i] / formant_scale) for i in range(4)]
-
-            # Klatt-style formant filters
-            y_mix = np.zeros(BLOCK_SAMPLES)
-            for i in range(4):
-                freq = max(100, min(scaled_f[i], self.fs/2-100))
-                bw = max(1.0, BW[i])  # Clamp bandwidth to avoid division by zero
-                Q = max(0.1, freq / bw) # Q = center_freq / bandwidth
-                bc, ac = signal.iirpeak(freq, Q, fs=self.fs)
-                y, self.zi_f[i] = signal.lfilter(bc, ac, src, zi=self.zi_f[i])
-                y_mix += y * Gains[i]
-            out[start:end] = y_mix
+            # Klatt-style formant filters, summed straight into the (zeroed) chunk
+            for i in range(n_formants):
+                zi = self.zi_f[i]
+                y = lfilter_into(b_all[mid, i], a_all[mid, i], src, zi, y_buf[:m])
+                if peak(zi) < DENORMAL_FLOOR: zi[:] = 0.0
+                y *= Gains[i]
+                seg += y
 
             # Fricatives: less noise, more filtered
             if af > 0.01:
                 cn = raw_noise[start:end]
-                total_n = np.zeros(BLOCK_SAMPLES)
+                total_n = noise_buf[:m]
+                total_n[:] = 0.0
                 if ms > 0:
-                    b, a = signal.butter(2, [3200, 5800], 'band', fs=self.fs)
-                    total_n += signal.lfilter(b, a, cn) * ms * 0.7
+                    b, a = butter_cached(2, (3200, 5800), 'band', self.fs)
+                    add_band(b, a, cn, ms, total_n)
                 if mm > 0:
-                    b, a = signal.butter(2, [1800, 4500], 'band', fs=self.fs)
-                    total_n += signal.lfilter(b, a, cn) * mm * 0.7
+                    b, a = butter_cached(2, (1800, 4500), 'band', self.fs)
+                    add_band(b, a, cn, mm, total_n)
                 if mh > 0:
-                    freq_low = max(300, scaled_f[1]-600)
-                    freq_high = min(self.fs/2-100, scaled_f[2]+600)
+                    freq_low = max(300, scaled[mid, 1]-600)
+                    freq_high = min(self.fs/2-100, scaled[mid, 2]+600)
                     if freq_low < freq_high:
-                        b, a = signal.butter(2, [freq_low, freq_high], 'band', fs=self.fs)
-                        total_n += signal.lfilter(b, a, cn) * mh * 0.7
-                out[start:end] += total_n * af
-
-            # Bursts: classic Klatt pop
-            if burst > 100:
-                pop = np.random.uniform(-1, 1, BLOCK_SAMPLES) * 2.5
-                freq_low = max(50, burst-600)
-                freq_high = min(self.fs/2-100, burst+600)
-                b, a = signal.butter(2, [freq_low, freq_high], 'band', fs=self.fs)
-                out[start:end] += self.soft_clip(signal.lfilter(b, a, pop)) * 0.6
+                        b, a = butter_cached(2, (freq_low, freq_high), 'band', self.fs)
+                        add_band(b, a, cn, mh, total_n)
+                total_n *= af
+                seg += total_n
+
+            # Bursts: classic Klatt pop, kept at their own frame inside long blocks
+            for fb in range(b0, b1):
+                burst = bursts[fb]
+                if burst <= 100: continue
+                bs = fb * BLOCK_SAMPLES
+                # Same draws as rng.uniform(-1, 1, BLOCK_SAMPLES)
+                self.rng.random(out=pop)
+                pop *= 2.0
+                pop -= 1.0
+                pop *= 2.5
+                if tier['burst_filter']:
+                    freq_low = max(50, burst-600)
+                    freq_high = min(self.fs/2-100, burst+600)
+                    b, a = butter_cached(2, (freq_low, freq_high), 'band', self.fs)
+                    zi_band[:] = 0.0
+                    lfilter_into(b, a, pop, zi_band, pop)
+                else:
+                    pop *= 0.25
+                self.soft_clip(pop, out=pop)
+                pop *= 0.6
+                out[bs:bs+BLOCK_SAMPLES] += pop
 
+        if marks is not None:
+            self.tracer.add_phoneme_spans(tracks['phonemes'], marks, time.perf_counter(), BLOCK_SAMPLES,
+                                          chunk=tracks.get('chunk'))
         self.phase_acc = phase
         return out
 
-    def speak(self, text):
+    def synthesize_batch(self, utterances, quality=None):
+        """
+        Synthesize N independent utterances in one pass.
+        utterances[i] is a list of (tracks, rng) chunks. Chunks of one utterance
+        share continuous filter state and each utterance starts from reset state,
+        exactly as in stream(). All chunks are split into control blocks by one
+        plan_blocks_batch call; one Numba kernel runs the voicing source, tilt
+        filter, formant bank and silent ring-outs of every block, and fricative
+        and burst filtering run once over all blocks that need them. Per
+        utterance the arithmetic is synthesize()'s, so a seeded item matches a
+        single render sample for sample. Without Numba the chunks go through
+        synthesize() one by one. Returns, per utterance, one float64 wave per
+        chunk (before post_process).
+        """
+        if not NUMBA_AVAILABLE:
+            return self._synthesize_each(utterances, quality)
+        out, bounds = self._synthesize_flat(utterances, quality)
+        chunks = iter(np.split(out, bounds[1:-1] * BLOCK_SAMPLES))
+        return [[next(chunks) for _ in chunk_list] for chunk_list in utterances]
+
+    def _synthesize_flat(self, utterances, quality):
+        """
+        synthesize_batch() without the final split: every chunk's wave back to
+        back in one float64 array, plus the chunk boundaries in frames
+        """
+        tier = resolve_quality(quality or self.quality)
+        voice = self.voice
+        BS = BLOCK_SAMPLES
+        chunk_frames = [[len(t['pitch']) for t, _ in chunks] for chunks in utterances]
+        bounds = np.cumsum([0] + [m for lens in chunk_frames for m in lens])
+        if bounds[-1] == 0:
+            return np.zeros(0, dtype=BIT_DEPTH), bounds
+        n_formants = tier['formants']
+        step = tier['control_blocks']
+
+        # Every chunk back to back: one control matrix (frames, TRACK_KEYS) and
+        # one sample axis. Each chunk draws its noise and burst pops from its own
+        # rng, in the order synthesize() would
+        ctrl = np.concatenate([np.stack([tracks[key] for key in TRACK_KEYS], axis=1)
+                               for chunks in utterances for tracks, _ in chunks])
+        raw_noise = np.empty(bounds[-1] * BS)
+        pops = []
+        for (tracks, rng), c0, c1 in zip((chunk for chunks in utterances for chunk in chunks), bounds[:-1], bounds[1:]):
+            rng.standard_normal(out=raw_noise[c0*BS:c1*BS])
+            pops.append(rng.random((np.count_nonzero(tracks['burst'] > 100), BS)))
+        raw_noise *= voice.noise_level
+
+        _, b0s, b1s, silents = plan_blocks_batch(dict(zip(TRACK_KEYS, ctrl.T)), bounds, step,
+                                                 tier.get('adaptive_tol', 0.0), tier.get('max_span', step))
+        item_start = bounds[np.cumsum([0] + [len(lens) for lens in chunk_frames])]  # first frame of each utterance
+        block_ptr = np.searchsorted(b0s, item_start)
+        scaled = np.maximum(50, ctrl[:, 0:4] / voice.formant_scale)
+        freqs = np.clip(scaled[:, :n_formants], 100, self.fs/2-100)
+        b_all, a_all = resonator_coeffs(freqs, self.fs, tier['resonator'] == 'pole')
+        longest = int((b1s - b0s).max()) * BS
+        out = np.zeros(bounds[-1] * BS, dtype=BIT_DEPTH)
+        synth_blocks_batch_jit(block_ptr, b0s, b1s, silents, ctrl[:, 4], ctrl[:, 5], b_all, a_all,
+                               voice.tilt_a, np.array(Gains), n_formants, step, BS, float(self.fs),
+                               DENORMAL_FLOOR, RING_FLOOR, np.arange(longest, dtype=BIT_DEPTH), np.empty(longest), out)
+
+        # Fricatives: every voiced block with frication, bands chosen per block
+        mids = (b0s + b1s - 1) // 2
+        fric = np.flatnonzero(~silents & (ctrl[mids, 6] > 0.01))
+        if len(fric):
+            fm = mids[fric]
+            lows = np.maximum(300, scaled[fm, 1] - 600)
+            highs = np.minimum(self.fs/2-100, scaled[fm, 2] + 600)
+            mixes = ctrl[fm, 7:10].copy()
+            mixes[lows >= highs, 2] = 0.0
+            b_band, a_band = np.zeros((len(fric), 3, 5)), np.zeros((len(fric), 3, 5))
+            b_band[:, 0], a_band[:, 0] = butter_cached(2, (3200, 5800), 'band', self.fs)
+            b_band[:, 1], a_band[:, 1] = butter_cached(2, (1800, 4500), 'band', self.fs)
+            sel = mixes[:, 2] > 0
+            if sel.any():
+                b_band[sel, 2], a_band[sel, 2] = band_coeffs(lows[sel], highs[sel], self.fs)
+            fricative_blocks_jit(b0s[fric] * BS, (b1s[fric] - b0s[fric]) * BS, b_band, a_band, mixes,
+                                 ctrl[fm, 6], raw_noise, out)
+
+        # Bursts: classic Klatt pop, one per burst frame, all filtered together
+        frames = np.flatnonzero(ctrl[:, 10] > 100)
+        if len(frames):
+            pop = np.concatenate(pops)  # same steps as synthesize(): uniform(-1, 1) * 2.5
+            pop *= 2.0
+            pop -= 1.0
+            pop *= 2.5
+            burst = ctrl[frames, 10]
+            if tier['burst_filter']:
+                b, a = band_coeffs(np.maximum(50, burst-600), np.minimum(self.fs/2-100, burst+600), self.fs)
+                lfilter_rows_jit(b, a, pop)
+            else:
+                pop *= 0.25
+            self.soft_clip(pop, out=pop)
+            pop *= 0.6
+            out.reshape(-1, BS)[frames] += pop
+        return out, bounds
+
+    def _synthesize_each(self, utterances, quality):
+        """synthesize_batch() without the batch kernels: each utterance through synthesize() from reset state"""
+        state = self.zi_f, self.zi_tilt, self.phase_acc, self.rng
+        waves = []
+        try:
+            for chunks in utterances:
+                self.zi_f, self.zi_tilt, self.phase_acc = [np.zeros(2) for _ in range(4)], np.zeros(1), 0.0
+                item = []
+                for tracks, rng in chunks:
+                    self.rng = rng
+                    item.append(self.synthesize(tracks, quality=quality))
+                waves.append(item)
+        finally:
+            self.zi_f, self.zi_tilt, self.phase_acc, self.rng = state
+        return waves
+
+    def render_batch(self, texts, quality=None, seed=None):
+        """
+        Render many independent utterances with one lockstep synthesis pass.
+        seed is an int (used for every text) or one seed per text; with a seed,
+        item i matches render(texts[i], seed=...) sample for sample on every tier.
+        Returns a list of float32 arrays.
+        """
+        quality = quality or self.quality
+        resolve_quality(quality)
+        seeds = list(seed) if isinstance(seed, (list, tuple)) else [seed] * len(texts)
+        utterances = []
+        for text, item_seed in zip(texts, seeds):
+            self.reset_filters()
+            rng = np.random.default_rng() if item_seed is None else None
+            chunks = []
+            for index, batch in enumerate(self.iter_batches(self.iter_phonemes(text))):
+                self.rng = rng if item_seed is None else chunk_rng(item_seed, index)
+                tracks = self.generate_tracks(batch)
+                if len(tracks['pitch']) > 0:
+                    chunks.append((tracks, self.rng))
+            utterances.append(chunks)
+        if not NUMBA_AVAILABLE:
+            results = []
+            for chunks_in, item in zip(utterances, self.synthesize_batch(utterances, quality=quality)):
+                self.last_peak = 0.0
+                chunks = [self.post_process(w, quality=quality, silent=silent_frames(tracks).all())
+                          for (tracks, _), w in zip(chunks_in, item)]
+                results.append(np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32))
+            return results
+        wave, bounds = self._synthesize_flat(utterances, quality)
+        bounds = bounds * BLOCK_SAMPLES
+        silent = [silent_frames(tracks).all() for chunks in utterances for tracks, _ in chunks]
+        first = np.zeros(len(silent), dtype=bool)
+        item_chunks = np.cumsum([0] + [len(chunks) for chunks in utterances])
+        first[item_chunks[:-1][item_chunks[:-1] < len(silent)]] = True
+        wave = self._post_process_flat(wave, bounds, silent, first, quality)
+        return np.split(wave, bounds[item_chunks[1:-1]])
+
+    def _post_process_flat(self, wave, bounds, silent, first, quality):
+        """
+        post_process() over many chunks at once: chunk k is
+        wave[bounds[k]:bounds[k+1]] and is post-processed in place, exactly as
+        post_process() would; last_peak restarts at 0 where first[k] is set
+        (the first chunk of an utterance). Returns the float32 result.
+        """
+        tier = resolve_quality(quality or self.quality)
+        if len(wave) == 0:
+            return wave.astype(np.float32)
+        if tier['post_chain']:
+            b, a = butter_cached(2, 8500, 'low', self.fs)
+            lfilter_flush_segments_jit(b, a, wave, bounds, DENORMAL_FLOOR, 1024)
+            b, a = butter_cached(1, 20, 'high', self.fs)
+            lfilter_flush_segments_jit(b, a, wave, bounds, DENORMAL_FLOOR, 1024)
+            wave *= 1.3
+            self.soft_clip(wave, out=wave)
+        mx = np.maximum(np.maximum.reduceat(wave, bounds[:-1]), -np.minimum.reduceat(wave, bounds[:-1]))
+        for k in range(len(mx)):  # the silent-chunk rule needs the running peak, chunk by chunk
+            if first[k]:
+                self.last_peak = 0.0
+            if silent[k]:
+                mx[k] = max(mx[k], self.last_peak)
+            else:
+                self.last_peak = mx[k]
+            if mx[k] > 0:
+                chunk = wave[bounds[k]:bounds[k+1]]
+                chunk /= mx[k]
+                chunk *= 0.92
+        return wave.astype(np.float32)
+
+    def post_process(self, wave, quality=None, out=None, silent=False):
+        """
+        Output chain applied to every synthesized chunk; returns float32.
+        With out (float32, at least len(wave) long) the result is written there
+        and wave is used as scratch, so the chain allocates no full-size copies.
+        A silent chunk (a pause: nothing but the previous chunk ringing out) is
+        scaled by the last sounding chunk's peak, or its own if that is higher,
+        so the tail is neither blown up to full level nor pushed past it.
+        """
+        tier = resolve_quality(quality or self.quality)
+        if tier['post_chain']:
+            # Better filtering pipeline
+            b, a = butter_cached(2, 8500, 'low', self.fs)  # Slightly lower cutoff
+            wave = lfilter_flush(b, a, wave, out=wave if out is not None else None)
+            # Gentle additional high-pass to remove DC
+            b, a = butter_cached(1, 20, 'high', self.fs)
+            wave = lfilter_flush(b, a, wave, out=wave)
+            wave *= 1.3
+            self.soft_clip(wave, out=wave)  # Slightly higher compression
+        elif out is None:
+            wave = wave.copy()
+        mx = peak(wave) if len(wave) else 0.0
+        if silent:
+            mx = max(mx, self.last_peak)  # never louder than 0.92, even if the ring-out is
+        else:
+            self.last_peak = mx
+        if mx > 0:  # Better normalization
+            wave /= mx
+            wave *= 0.92
+        if out is None:
+            return wave.astype(np.float32)
+        out = out[:len(wave)]
+        out[:] = wave
+        return out
+
+    def iter_batches(self, full_stream):
+        """
+        Split a phoneme stream into synthesis chunks at pauses and word boundaries.
+        full_stream is a compact stream, a legacy tuple list, or an iterator of
+        compact stream pieces (as produced by iter_phonemes).
+        """
+        if isinstance(full_stream, np.ndarray):
+            pieces = [full_stream]
+        elif isinstance(full_stream, list):
+            pieces = [encode_stream(full_stream)]
+        else:
+            pieces = full_stream
+        carry = None
+        for piece in pieces:
+            if carry is not None and len(carry):
+                piece = np.concatenate([carry, piece])
+            ids = piece['id']
+            mandatory = MANDATORY_BREAK[ids].tolist()
+            is_boundary = (ids == WORD_BOUNDARY_ID).tolist()
+            start = 0
+            for i in range(len(ids)):
+                is_buffer_full = i - start + 1 > 15
+                if mandatory[i] or (is_boundary[i] and is_buffer_full):
+                    yield piece[start:i+1]
+                    start = i + 1
+            carry = piece[start:]
+
+    def stream(self, text, quality=None, seed=None, fmt='float32', out=None):
+        """
+        Yield post-processed chunks for text, one per synthesis batch.
+        fmt selects the output format (see encoders.FORMATS): 'float32' at the
+        engine rate, 'pcm16', or G.711 'ulaw'/'alaw' at 8 kHz. With out, each
+        chunk is encoded into the start of that caller buffer and the yielded
+        value is a view of it, valid until the next chunk is requested.
+        """
+        if fmt == 'float32' and out is None:
+            yield from self._stream_float(text, quality=quality, seed=seed)
+            return
+        encoder = Encoder(fmt, self.fs, seed=seed)
+        for wave in self._stream_float(text, quality=quality, seed=seed, reuse=True):
+            yield encoder.encode(wave, out=out)
+
+    def _stream_float(self, text, quality=None, seed=None, reuse=False):
+        """
+        Yield post-processed float32 chunks for text, one per synthesis batch.
+        text may also be a file-like object or an iterable of str; the front end
+        runs incrementally, so audio starts after the first clause.
+        With a seed the render is bit-reproducible: chunk i draws from
+        chunk_rng(seed, i), so chunks do not depend on each other's draws.
+        A str found in an attached prompt pack built at the requested quality
+        (and seed, when one is given) is yielded straight from the pack's
+        mapping. With a render cache attached, a str that was rendered
+        before is replayed from the cache as the same read-only chunks it was
+        first streamed as (no DSP work), and a miss is stored once the stream
+        has been fully consumed.
+        With reuse (for consumers that copy or encode each chunk right away) a
+        synthesized chunk is a view of a pooled buffer that the next chunk
+        overwrites; without it, each yielded chunk is a new array.
+        """
+        quality = quality or self.quality
+        resolve_quality(quality)
+        if isinstance(text, str):
+            for pack in self.prompt_packs:
+                if pack.quality != quality or (seed is not None and seed != pack.seed):
+                    continue
+                audio = pack.get(text)
+                if audio is not None:
+                    yield audio
+                    return
+        key = None
+        if self.cache is not None and isinstance(text, str):
+            key = make_key(text, self.voice.profile_hash, self.fs, quality, seed)
+            chunks = self.cache.get_chunks(key)
+            if chunks is not None:
+                yield from chunks
+                return
+        reuse = reuse and key is None
+        chunks = []
+        self.reset_filters()
+        if seed is None:
+            self.rng = np.random.default_rng()
+        batches = self.iter_batches(self.iter_phonemes(text))
+        if self.tracer is not None:
+            batches = self.tracer.iter('front_end', batches)  # text cleanup, G2P and batching per chunk
+        for index, batch in enumerate(batches):
+            if seed is not None:
+                self.rng = chunk_rng(seed, index)
+            with self._span('chunk', 'chunk', index=index, phonemes=len(batch)) as chunk:
+                with self._span('tracks', chunk=index):
+                    tracks = self.generate_tracks(batch)
+                chunk['frames'] = len(tracks['pitch'])
+                if len(tracks['pitch']) == 0:
+                    continue
+                if self.tracer is not None: tracks['chunk'] = index
+                total = len(tracks['pitch']) * BLOCK_SAMPLES
+                with self._span('synthesize', chunk=index, frames=len(tracks['pitch'])) as span:
+                    wave = self.synthesize(tracks, quality=quality, out=self.pool.get('chunk', total))
+                    span['samples'] = chunk['samples'] = len(wave)
+                with self._span('post_process', chunk=index, samples=len(wave)):
+                    out = self.pool.get('chunk_f32', total, np.float32) if reuse else None
+                    wave = self.post_process(wave, quality=quality, out=out, silent=silent_frames(tracks).all())
+            if key is not None: chunks.append(wave)
+            yield wave
+        if key is not None:
+            audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+            self.cache.put(key, audio, np.cumsum([len(c) for c in chunks[:-1]], dtype=np.int64))
+
+    def render(self, text, quality=None, seed=None, fmt='float32', out=None):
+        """
+        Synthesize text to a single array without playing it.
+        fmt is an output format as for stream(). With out, the whole utterance is
+        encoded into that caller buffer back to back and a view of the written
+        part is returned (ValueError if it does not fit).
+        """
+        if out is not None:
+            encoder = Encoder(fmt, self.fs, seed=seed)
+            pos = 0
+            for wave in self._stream_float(text, quality=quality, seed=seed, reuse=True):
+                pos += len(encoder.encode(wave, out=out, offset=pos))
+            return output_view(out, encoder.dtype, pos)
+        chunks = list(self.stream(text, quality=quality, seed=seed, fmt=fmt))
+        if not chunks: return np.zeros(0, dtype=FORMATS[fmt][0])
+        return np.concatenate(chunks)
+
+    def stream_to(self, sink, text, quality=None, seed=None):
+        """
+        Push post-processed float32 chunks for text into sink (anything with a
+        write(chunk) method, e.g. a ShmRingWriter). Returns the number of chunks.
+        A chunk is only valid during its write() call (its buffer is reused for
+        the next chunk); a sink that keeps chunks must copy them.
+        """
+        count = 0
+        for wave in self._stream_float(text, quality=quality, seed=seed, reuse=True):
+            sink.write(wave)
+            count += 1
+        return count
+
+    def speak(self, text, quality=None, seed=None, player=None):
+        """
+        Play text through a RealtimePlayer (the default sound device unless one is
+        given). Playback stats of the last call are kept in self.playback_stats.
+        """
         print(f" Synth: '{text}'")
-        self.reset_filters() 
-        full_stream = self.parse_text(text)
-        current_batch = []
-        
+        resolve_quality(quality or self.quality)
         try:
-            with sd.OutputStream(samplerate=self.fs, channels=1, dtype='float32') as stream:
-                for i, item in enumerate(full_stream):
-                    current_batch.append(item)
-                    is_mandatory = item[0] in ['PAUSE', 'BREATH', 'END_OF_STREAM']
-                    is_boundary = (item[0] == 'WORD_BOUNDARY')
-                    is_buffer_full = len(current_batch) > 15
-                    
-                    if is_mandatory or (is_boundary and is_buffer_full):
-                        tracks = self.generate_tracks(current_batch)
-                        if len(tracks['pitch']) > 0:
-                            wave = self.synthesize(tracks)
-                            # Better filtering pipeline
-                            b, a = signal.butter(2, 8500, 'low', fs=self.fs)  # Slightly lower cutoff
-                            wave = signal.lfilter(b, a, wave)
-                            # Gentle additional high-pass to remove DC
-                            b, a = signal.butter(1, 20, 'high', fs=self.fs)
-                            wave = signal.lfilter(b, a, wave)
-                            wave = self.soft_clip(wave * 1.3)  # Slightly higher compression
-                            mx = np.max(np.abs(wave))
-                            if mx > 0: wave = (wave/mx) * 0.92  # Better normalization
-                            stream.write(wave.astype(np.float32))
-                        current_batch = []
-        except sd.PortAudioError as e:
-            print(f"Audio Error: Could not open audio stream. Check your sound device settings. Details: {e}")
+            own = player is None
+            player = RealtimePlayer(self.fs) if own else player
+            try:
+                self.stream_to(player.start(), text, quality=quality, seed=seed)
+                if not player.drain(timeout=player.buffer.level / player.fs + player.write_timeout):
+                    raise RuntimeError("Audio device stopped consuming while draining")
+                self.playback_stats = player.stats()
+            finally:
+                if own: player.stop()
+            if self.playback_stats['underruns']:
+                print(f"Audio: {self.playback_stats['underruns']} underrun(s), "
+                      f"{self.playback_stats['underrun_ms']:.0f} ms of silence inserted")
+        except RuntimeError as e:
+            print(f"Audio Error: {e}. Check your sound device settings.")
         except Exception as e:
             print(f"An unexpected error occurred during playback: {e}")
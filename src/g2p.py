@@ -1,4 +1,13 @@
 import re
+
+from src.g2p_rules import RuleG2P, RUSSIAN, ARABIC
+
+# One scan classifies a word: first Cyrillic or Arabic character wins, Cyrillic anywhere means RU
+SCRIPT_RE = re.compile(r'(?P<RU>[\u0400-\u04FF])|(?P<AR>[\u0600-\u06FF])')
+CYRILLIC_RE = re.compile(r'[\u0400-\u04FF]')
+# Words g2p-en maps one-to-one when a whole run is sent in a single call
+EN_BATCHABLE_RE = re.compile(r"[A-Za-z']+")
+
 try:
     from g2p_en import G2p as G2P_EN
     G2P_ENGLISH = G2P_EN()
@@ -8,30 +17,43 @@ except ImportError:
     )
 
 
+# Per-letter maps (no context): the original converters, kept as a baseline
+RU_LETTER_MAP = {
+    'А': ['AA'], 'Б': ['B'], 'В': ['V'], 'Г': ['G'], 'Д': ['D'], 'Е': ['IY', 'EH'],
+    'Ё': ['IY', 'AO'], 'Ж': ['ZH'], 'З': ['Z'], 'И': ['IY'], 'Й': ['Y'], 'К': ['K'],
+    'Л': ['L'], 'М': ['M'], 'Н': ['N'], 'О': ['AO'], 'П': ['P'], 'Р': ['RR'],
+    'С': ['S'], 'Т': ['T'], 'У': ['UW'], 'Ф': ['F'], 'Х': ['KH'], 'Ц': ['T', 'S'],
+    'Ч': ['CH'], 'Ш': ['SH'], 'Щ': ['SH', 'CH'], 'Ъ': ['PAUSE'], 'Ы': ['IH'],
+    'Ь': [], 'Э': ['EH'], 'Ю': ['Y', 'UW'], 'Я': ['Y', 'AA']
+}
+
+AR_LETTER_MAP = {
+    'ا': 'AA', 'ب': 'B', 'ت': 'T', 'ث': 'TH', 'ج': 'JH', 'ح': 'H_AR',
+    'خ': 'KH', 'د': 'D', 'ذ': 'DH', 'ر': 'RR', 'ز': 'Z', 'س': 'S',
+    'ش': 'SH', 'ص': 'S_AR', 'ض': 'D_AR', 'ط': 'T_AR', 'ظ': 'Z_AR',
+    'ع': 'AIN', 'غ': 'GH', 'ف': 'F', 'ق': 'Q', 'ك': 'K', 'ل': 'L',
+    'م': 'M', 'ن': 'N', 'ه': 'HH', 'و': 'UW', 'ي': 'IY', 'ة': 'T',
+    'ء': 'Q', 'ؤ': 'Q', 'ئ': 'Q', 'ى': 'AA'
+}
+
+
 class MultiLingualG2P:
-    def __init__(self):
-        """Initialize multilingual G2P using public libraries"""
+    def __init__(self, cache_size=50000):
+        """
+        Initialize multilingual G2P using public libraries
+
+        Args:
+            cache_size: Words kept per language in the Russian / Arabic LRU word caches
+        """
         self.g2p_en = G2P_ENGLISH
         
-        # Russian character to phoneme mapping
-        self.ru_map = {
-            'А': ['AA'], 'Б': ['B'], 'В': ['V'], 'Г': ['G'], 'Д': ['D'], 'Е': ['IY', 'EH'],
-            'Ё': ['IY', 'AO'], 'Ж': ['ZH'], 'З': ['Z'], 'И': ['IY'], 'Й': ['Y'], 'К': ['K'],
-            'Л': ['L'], 'М': ['M'], 'Н': ['N'], 'О': ['AO'], 'П': ['P'], 'Р': ['RR'],
-            'С': ['S'], 'Т': ['T'], 'У': ['UW'], 'Ф': ['F'], 'Х': ['KH'], 'Ц': ['T', 'S'],
-            'Ч': ['CH'], 'Ш': ['SH'], 'Щ': ['SH', 'CH'], 'Ъ': ['PAUSE'], 'Ы': ['IH'],
-            'Ь': [], 'Э': ['EH'], 'Ю': ['Y', 'UW'], 'Я': ['Y', 'AA']
-        }
-        
-        # Arabic character to phoneme mapping
-        self.ar_cons = {
-            'ا': 'AA', 'ب': 'B', 'ت': 'T', 'ث': 'TH', 'ج': 'JH', 'ح': 'H_AR',
-            'خ': 'KH', 'د': 'D', 'ذ': 'DH', 'ر': 'RR', 'ز': 'Z', 'س': 'S',
-            'ش': 'SH', 'ص': 'S_AR', 'ض': 'D_AR', 'ط': 'T_AR', 'ظ': 'Z_AR',
-            'ع': 'AIN', 'غ': 'GH', 'ف': 'F', 'ق': 'Q', 'ك': 'K', 'ل': 'L',
-            'م': 'M', 'ن': 'N', 'ه': 'HH', 'و': 'UW', 'ي': 'IY', 'ة': 'T',
-            'ء': 'Q', 'ؤ': 'Q', 'ئ': 'Q', 'ى': 'AA'
-        }
+        # Letter maps of the original per-character converters (kept as the benchmark baseline)
+        self.ru_map = RU_LETTER_MAP
+        self.ar_cons = AR_LETTER_MAP
+
+        # Context rule engines with LRU word caches
+        self.ru_rules = RuleG2P(RUSSIAN, cache_size=cache_size)
+        self.ar_rules = RuleG2P(ARABIC, cache_size=cache_size)
 
     def detect_script(self, text):
         """Detect script type: English, Russian, or Arabic"""
@@ -41,6 +63,22 @@ class MultiLingualG2P:
             return 'AR'
         return 'EN'
 
+    def detect_scripts(self, words):
+        """Script of each word (same result as detect_script; ASCII words skip the regex scan)"""
+        scripts = []
+        for w in words:
+            if w.isascii():  # plain English needs no scan
+                scripts.append('EN')
+                continue
+            m = SCRIPT_RE.search(w)
+            if m is None:
+                scripts.append('EN')
+            elif m.lastgroup == 'RU' or CYRILLIC_RE.search(w, m.end()):
+                scripts.append('RU')
+            else:
+                scripts.append('AR')
+        return scripts
+
     def predict_english(self, word):
         """Convert English text to phonemes using g2p-en"""
         try:
@@ -52,17 +90,20 @@ class MultiLingualG2P:
             return ['AH']
 
     def predict_russian(self, word):
-        """Convert Russian text to phonemes"""
-        phonemes = []
-        word = word.upper()
-        for char in word:
-            if char in self.ru_map:
-                phonemes.extend(self.ru_map[char])
-        return phonemes
+        """Convert Russian text to phonemes (stress may be marked with U+0301 after the vowel)"""
+        return self.ru_rules.predict(word)
 
     def predict_arabic(self, word):
         """Convert Arabic text to phonemes"""
+        return self.ar_rules.predict(word) or ['AH']
+
+    def predict_letters(self, word, script):
+        """Per-letter conversion without context rules (the original RU / AR converters)"""
         phonemes = []
+        if script == 'RU':
+            for char in word.upper():
+                phonemes.extend(self.ru_map.get(char, ()))
+            return phonemes
         for char in word:
             if char in self.ar_cons:
                 phonemes.append(self.ar_cons[char])
@@ -77,3 +118,56 @@ class MultiLingualG2P:
             return (self.predict_arabic(word), True)
         else:
             return (self.predict_english(word), False)
+
+    def predict_english_batch(self, words):
+        """
+        Convert a run of English words with one g2p-en call.
+        Words are deduplicated first; anything g2p-en might not map one-to-one
+        (digits, underscores) or a run whose output does not align falls back
+        to per-word calls.
+        """
+        unique = list(dict.fromkeys(w.lower() for w in words))
+        batch = [w for w in unique if EN_BATCHABLE_RE.fullmatch(w)]
+        prons = {}
+        if batch:
+            try:
+                phonemes = self.g2p_en(' '.join(batch))
+            except Exception as e:
+                print(f"Error in English G2P: {e}")
+                phonemes = None
+            groups = [[]]
+            for p in phonemes or []:
+                if p == ' ': groups.append([])
+                elif p.strip(): groups[-1].append(p)
+            if phonemes is not None and len(groups) == len(batch):
+                prons.update(zip(batch, groups))
+        for w in unique:
+            if w not in prons:
+                prons[w] = self.predict_english(w)
+        return [prons[w.lower()] for w in words]
+
+    def predict_batch(self, text):
+        """
+        Predict phonemes for a whole clause or sentence (str or list of words).
+        Words are split into runs of the same script in one pass and each run
+        is sent to its predictor in bulk. Returns a (phonemes, is_slow) tuple
+        per word, like predict.
+        """
+        words = text.split() if isinstance(text, str) else list(text)
+        scripts = self.detect_scripts(words)
+        results = []
+        i = 0
+        while i < len(words):
+            j = i
+            while j < len(words) and scripts[j] == scripts[i]:
+                j += 1
+            run = words[i:j]
+            if scripts[i] == 'EN':
+                results.extend((pron, False) for pron in self.predict_english_batch(run))
+            else:
+                is_slow = scripts[i] == 'AR'
+                rules = self.ar_rules if is_slow else self.ru_rules
+                for pron in rules.predict_words(run):
+                    results.append((list(pron) or (['AH'] if is_slow else []), is_slow))
+            i = j
+        return results
@@ -0,0 +1,353 @@
+"""
+Rule-based G2P - compiled context rewrite rules for Russian and Arabic
+A rule rewrites a target letter sequence to phonemes when its left and right
+contexts match: (left, target, right, phonemes). Rules are ordered; at each
+position the first rule that matches wins and the scan continues after its
+target. A letter's context-free rule is its default and goes straight into a
+str.translate table. The rules before it compile to one regular expression
+whose branches form the first level of a letter trie (rules grouped by the
+first letter of their target, in rule order; common letters are tried first).
+Each branch is a named group whose one-character name is a rule token, so a
+batch of words is rewritten in C: one regex pass replaces each match with its
+token, one translate maps tokens and default letters to phonemes.
+
+Contexts are regex fragments with {X} class macros. left is fixed width
+(lookbehind): '' (any), '#' (word start), a class, or '!class' (not preceded
+by it). right is any lookahead fragment; {#} is the end of the word.
+
+Russian: stress comes from a U+0301 accent after the stressed vowel, Ё, or a
+lexicon of frequent words, else the penultimate vowel is assumed (clitics stay
+unstressed); unstressed vowels are reduced (akanye / ikanye), Ь palatalizes
+(a Y offglide, or iotation of the next vowel), obstruents devoice word-finally
+and assimilate in voicing. Arabic: harakat, tanwin, shadda (gemination), long
+vowels and diphthongs, the definite article with sun letters, hamza and ta
+marbuta; undiacritized words get a default fatha between consonants.
+"""
+
+import re
+import itertools
+import threading
+from operator import attrgetter
+from collections import OrderedDict, deque
+
+ACUTE = '́'  # Russian stress mark, written after the stressed vowel
+TOKEN_BASE = 0x4E00  # first rule token: CJK ideographs are valid group names
+LASTGROUP = attrgetter('lastgroup')  # match -> its rule token, without a Python-level call
+UNKNOWN = '\x00'  # stands in for characters no rule mentions
+
+
+class RuleSet:
+    def __init__(self, name, rules, classes, prepare=None, exceptions=None, frequent=''):
+        """
+        Args:
+            name: Language name (for messages)
+            rules: Ordered (left, target, right, phonemes) tuples; phonemes is a
+                   space-separated string ('' = silent)
+            classes: Macro name -> characters, used as {name} in contexts
+            prepare: Optional word -> word normalization run before the rules
+            exceptions: Optional word -> phonemes lexicon, checked before the rules
+            frequent: Letters, most frequent first; their trie branches are tried
+                      first (only speed changes, a position has one matching branch)
+        """
+        self.name = name
+        self.classes = classes
+        self.prepare = prepare or (lambda word: word)
+        self.exceptions = {w: tuple(p.split()) for w, p in (exceptions or {}).items()}
+        # A letter's first rule with no context and a one-letter target is its
+        # default: it always matches, so later rules for that letter never fire.
+        # Defaults go into a translate table; only the rules before them (the
+        # context-dependent ones) need the regex.
+        self.defaults = {}  # letter -> phonemes
+        branches = OrderedDict()  # first letter -> [(branch regex, phonemes)]
+        for n, (left, target, right, out) in enumerate(rules):
+            if not target or '\n' in target:
+                raise ValueError(f"{name} rule {n}: target must be non-empty and single-line")
+            if target[0] in self.defaults:
+                continue
+            out = ' '.join(out.split()) + ' ' if out.strip() else ''
+            if not left and not right and len(target) == 1:
+                self.defaults[target] = out
+                continue
+            branch = re.escape(target[1:]) + self._left(left, target) + (f"(?={self._expand(right)})" if right else '')
+            branches.setdefault(target[0], []).append((branch, out))
+        # Each branch is a named group whose name is one character (from
+        # TOKEN_BASE up); the first pass replaces a match with its group name,
+        # the second translates names and default letters to phonemes in C.
+        # The regex engine tries branches in order, so the common letters
+        # come first and a typical letter fails few first-letter tests.
+        self.table = {ord(c): out for c, out in self.defaults.items()}
+        tokens = (chr(TOKEN_BASE + i) for i in itertools.count())
+        parts = []
+        rank = {c: i for i, c in enumerate(frequent)}
+        for first, group in sorted(branches.items(), key=lambda item: rank.get(item[0], len(rank))):
+            alts = []
+            for branch, out in group:
+                token = next(tokens)
+                alts.append(f"(?P<{token}>{branch})")
+                self.table[ord(token)] = out
+            parts.append(f"{re.escape(first)}(?:{'|'.join(alts)})")
+        self.regex = re.compile('|'.join(parts), re.S)
+        # Characters no rule or context mentions (token characters among them)
+        # become UNKNOWN first, which no context matches either; the table
+        # drops them, and any known character no rule covered
+        known = set(''.join(classes.values()))
+        for left, target, right, _ in rules:
+            known.update(c for c in left + target + right if not c.isascii())
+        self.unknown = re.compile(f"[^{re.escape(''.join(sorted(known)))}\n]")
+        for c in known | {UNKNOWN}:
+            self.table.setdefault(ord(c), '')
+
+    def _expand(self, fragment):
+        fragment = fragment.replace('{#}', '(?![{L}])')
+        return re.sub(r'\{(\w+)\}', lambda m: re.escape(self.classes[m.group(1)]), fragment)
+
+    def _left(self, left, target):
+        """Lookbehind over the context and the target just consumed"""
+        if not left:
+            return ''
+        if left == '#':
+            return f"(?<![{re.escape(self.classes['L'])}]{re.escape(target)})"
+        negative = left.startswith('!')
+        context = self._expand(left[1:] if negative else left)
+        return f"(?<{'!' if negative else '='}{context}{re.escape(target)})"
+
+    def convert(self, words):
+        """Phoneme tuples for words, rewritten in one pass over the joined batch"""
+        todo, slots, results = words, None, None
+        if self.exceptions:
+            keys = '\n'.join(words).upper().replace(ACUTE, '').split('\n')
+            found = list(map(self.exceptions.get, keys))
+            if any(found):
+                slots = [i for i, out in enumerate(found) if out is None]
+                todo, results = [words[i] for i in slots], found
+        if not todo:
+            return results
+        text = self.unknown.sub(UNKNOWN, '\n'.join(map(self.prepare, todo)))
+        text = self.regex.sub(LASTGROUP, text).translate(self.table)
+        converted = list(map(tuple, map(str.split, text.split('\n'))))
+        if slots is None:
+            return converted
+        for i, phonemes in zip(slots, converted):
+            results[i] = phonemes
+        return results
+
+
+class RuleG2P:
+    def __init__(self, rules, cache_size=50000):
+        """
+        Args:
+            rules: Compiled RuleSet
+            cache_size: Words kept in the LRU word cache (0 = no cache)
+        """
+        self.rules = rules
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # word -> phoneme tuple, most recently used last
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def predict(self, word):
+        return list(self.predict_words([word])[0])
+
+    def predict_words(self, words):
+        """Phoneme tuples per word; cache misses are converted together in one pass"""
+        cache = self._cache
+        with self._lock:
+            results = list(map(cache.get, words))
+            if None not in results:
+                deque(map(cache.move_to_end, words), maxlen=0)  # LRU touch, looped in C
+                self.hits += len(words)
+                return results
+            missing = list(dict.fromkeys(w for w, out in zip(words, results) if out is None))
+            deque(map(cache.move_to_end, (w for w, out in zip(words, results) if out is not None)), maxlen=0)
+            self.misses += len(missing)
+            self.hits += len(words) - results.count(None)
+        converted = dict(zip(missing, self.rules.convert(missing)))
+        with self._lock:
+            if self.cache_size:
+                cache.update(converted)
+                while len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+        return [converted[w] if out is None else out for w, out in zip(words, results)]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+# --- Russian -----------------------------------------------------------------
+
+RU_VOWELS = 'АЕЁИОУЫЭЮЯ'
+RU_CONSONANTS = 'БВГДЖЗЙКЛМНПРСТФХЦЧШЩ'
+RU_CLASSES = {
+    'V': RU_VOWELS,
+    'C': RU_CONSONANTS,
+    'L': RU_VOWELS + RU_CONSONANTS + 'ЬЪ' + ACUTE,
+    'S': ACUTE,
+    'U': 'ПФКТШСХЦЧЩ',  # voiceless: devoice a voiced obstruent before them
+    'D': 'БГДЖЗ',       # voiced obstruents that voice a voiceless one before them
+    'H': 'ЖШЦ',         # always hard
+}
+# Words that carry no stress of their own
+RU_CLITICS = {'В', 'С', 'К', 'У', 'О', 'А', 'И', 'НА', 'НЕ', 'НИ', 'ПО', 'ЗА', 'ИЗ', 'ОТ', 'ДО', 'ОБ',
+              'ПОД', 'НАД', 'БЕЗ', 'ПРИ', 'ПРО', 'ДЛЯ', 'НО', 'ДА', 'ЖЕ', 'ЛИ', 'БЫ', 'КО', 'СО', 'ВО'}
+RU_EXCEPTIONS = {
+    'ЧТО': 'SH T AO1', 'ЧТОБЫ': 'SH T AO1 B IH', 'КОНЕЧНО': 'K AH N EH1 SH N AH',
+    'СЕГОДНЯ': 'S IH V AO1 D N Y AH', 'ЕГО': 'Y IH V AO1', 'ТОГО': 'T AH V AO1',
+    'ВСЕГО': 'F S IH V AO1', 'НИЧЕГО': 'N IH CH IH V AO1', 'МНОГО': 'M N AO1 G AH',
+    'ХОРОШО': 'KH AH RR AH SH AO1', 'ПРИВЕТ': 'P RR IY V EH1 T', 'МОЛОКО': 'M AH L AH K AO1',
+    'ЗДРАВСТВУЙТЕ': 'Z D RR AA1 S T V UW Y T IH', 'СОЛНЦЕ': 'S AO1 N T S AH',
+}
+# Stress lexicon: frequent words not stressed on the penultimate vowel ('+' after the stressed vowel)
+RU_STRESS = {w.replace('+', ''): w.replace('+', ACUTE) for w in (
+    'МОСКВА+', 'ВОКЗА+Л', 'РАССКА+З', 'ЛЮБО+ВЬ', 'ЧЕЛОВЕ+К', 'НАРО+Д', 'ВОПРО+С', 'ОТВЕ+Т', 'РАЗГОВО+Р',
+    'МАГАЗИ+Н', 'РЕСТОРА+Н', 'ТЕЛЕФО+Н', 'УНИВЕРСИТЕ+Т', 'ЯЗЫ+К', 'ОТЕ+Ц', 'ВОДА+', 'РУКА+', 'НОГА+',
+    'ГОЛОВА+', 'ЗЕМЛЯ+', 'СТРАНА+', 'ЖЕНА+', 'СЕСТРА+', 'ОКНО+', 'ВИНО+', 'ПИСЬМО+', 'ЛИЦО+',
+    'ОНА+', 'ОНО+', 'ОНИ+', 'МЕНЯ+', 'ТЕБЯ+', 'СЕБЯ+', 'ОДИ+Н', 'ОДНА+', 'ОДНО+', 'ДРУГО+Й',
+    'БОЛЬШО+Й', 'МОЛОДО+Й', 'ТЕПЕ+РЬ', 'ПОТО+М', 'ПОТОМУ+', 'КОГДА+', 'ТОГДА+', 'ВСЕГДА+', 'НИКОГДА+',
+    'КУДА+', 'ТУДА+', 'СЮДА+', 'ВЕЗДЕ+', 'ПОКА+', 'ОПЯ+ТЬ', 'СЕЙЧА+С', 'НАЗА+Д', 'ПОЖА+ЛУЙСТА',
+    'ГОВОРИ+ТЬ', 'ГОВОРИ+Т', 'СМОТРЕ+ТЬ', 'ХОДИ+ТЬ', 'ЛЮБИ+ТЬ', 'ЖИВУ+', 'ИДУ+', 'МОГУ+', 'ХОЧУ+',
+)}
+RU_VOWEL_MARKS = str.maketrans(dict.fromkeys(RU_VOWELS, UNKNOWN))
+# Letter frequency order (see RuleSet frequent)
+RU_FREQUENT = 'ОЕАИНТСРВЛКМДПУЯЫЬГЗБЧЙХЖШЮЦЩЭФЪЁ'
+PRETONIC = '[{C}ЬЪ]*[{V}]{S}'  # the next vowel is the stressed one
+
+RU_RULES = [
+    # Reflexive -ться / -тся
+    ('', 'ТЬСЯ', '{#}', 'T S AH'),
+    ('', 'ТСЯ', '{#}', 'T S AH'),
+    # Soft and hard signs: silent after hushers, iotation before a vowel
+    # (see the vowels below), otherwise a palatal offglide
+    ('[ЖШЧЩ]', 'Ь', '', ''),
+    ('', 'Ь', '[{V}]', ''),
+    ('', 'Ь', '', 'Y'),
+    ('', 'Ъ', '', ''),
+]
+# Double consonants are pronounced once
+RU_RULES += [('', c, c, '') for c in RU_CONSONANTS]
+# Voicing: final devoicing and regressive assimilation
+for voiced, voiceless, p_voiced, p_voiceless in [('Б', 'П', 'B', 'P'), ('В', 'Ф', 'V', 'F'), ('Г', 'К', 'G', 'K'),
+                                                ('Д', 'Т', 'D', 'T'), ('Ж', 'Ш', 'ZH', 'SH'), ('З', 'С', 'Z', 'S')]:
+    # A pair member next to its partner assimilates into it: one consonant (мягкий, отдать)
+    RU_RULES += [('', voiced, voiceless, ''), ('', voiceless, voiced, '')]
+    RU_RULES.append(('', voiced, 'Ь?(?:[{D}]Ь?)*(?:{#}|[{U}])', p_voiceless))
+    RU_RULES.append(('', voiceless, 'Ь?[{D}]', p_voiced))
+RU_RULES += [
+    # Iotated vowels at word start, after a vowel or a sign
+    ('![{C}]', 'Я' + ACUTE, '', 'Y AA1'), ('![{C}]', 'Е' + ACUTE, '', 'Y EH1'),
+    ('![{C}]', 'Ю' + ACUTE, '', 'Y UW1'), ('![{C}]', 'Ё' + ACUTE, '', 'Y AO1'),
+    ('![{C}]', 'Я', '{#}', 'Y AH'), ('![{C}]', 'Я', '', 'Y IH'), ('![{C}]', 'Е', '', 'Y IH'),
+    ('![{C}]', 'Ю', '', 'Y UW'), ('![{C}]', 'Ё', '', 'Y AO'),
+    # After always-hard consonants
+    ('[{H}]', 'Е' + ACUTE, '', 'EH1'), ('[{H}]', 'Ё' + ACUTE, '', 'AO1'), ('[{H}]', 'И' + ACUTE, '', 'IH1'),
+    ('[{H}]', 'Е', '', 'IH'), ('[{H}]', 'Ё', '', 'AO'), ('[{H}]', 'И', '', 'IH'),
+    # After a soft consonant: an offglide before back vowels (front vowels carry the F2 rise)
+    ('', 'Я' + ACUTE, '', 'Y AA1'), ('', 'Ю' + ACUTE, '', 'Y UW1'), ('', 'Ё' + ACUTE, '', 'Y AO1'),
+    ('', 'Е' + ACUTE, '', 'EH1'), ('', 'И' + ACUTE, '', 'IY1'),
+    ('', 'Я', '{#}', 'AH'), ('', 'Я', '', 'IH'), ('', 'Е', '', 'IH'), ('', 'Ю', '', 'Y UW'), ('', 'Ё', '', 'Y AO'),
+    # Stressed plain vowels
+    ('', 'А' + ACUTE, '', 'AA1'), ('', 'О' + ACUTE, '', 'AO1'), ('', 'У' + ACUTE, '', 'UW1'),
+    ('', 'Ы' + ACUTE, '', 'IH1'), ('', 'Э' + ACUTE, '', 'EH1'),
+    # Unstressed: А/О are [a] word-initially and right before the stress, schwa elsewhere
+    ('[ЧЩ]', 'А', '', 'IH'),
+    ('#', 'А', '', 'AA'), ('#', 'О', '', 'AA'),
+    ('', 'А', PRETONIC, 'AA'), ('', 'О', PRETONIC, 'AA'),
+    ('', 'А', '', 'AH'), ('', 'О', '', 'AH'),
+    ('', 'У', '', 'UW'), ('', 'Ы', '', 'IH'), ('', 'И', '', 'IH'), ('', 'Э', '', 'EH'),
+    # Consonants
+    ('', 'Б', '', 'B'), ('', 'В', '', 'V'), ('', 'Г', '', 'G'), ('', 'Д', '', 'D'), ('', 'Ж', '', 'ZH'),
+    ('', 'З', '', 'Z'), ('', 'Й', '', 'Y'), ('', 'К', '', 'K'), ('', 'Л', '', 'L'), ('', 'М', '', 'M'),
+    ('', 'Н', '', 'N'), ('', 'П', '', 'P'), ('', 'Р', '', 'RR'), ('', 'С', '', 'S'), ('', 'Т', '', 'T'),
+    ('', 'Ф', '', 'F'), ('', 'Х', '', 'KH'), ('', 'Ц', '', 'T S'), ('', 'Ч', '', 'CH'), ('', 'Ш', '', 'SH'),
+    ('', 'Щ', '', 'SH'),
+]
+
+
+def prepare_russian(word):
+    """Upper-case and mark the stressed vowel with ACUTE (given, Ё, RU_STRESS, or the penultimate vowel)"""
+    word = word.upper()
+    if ACUTE in word or word in RU_CLITICS:
+        return word
+    if word in RU_STRESS:
+        return RU_STRESS[word]
+    k = word.find('Ё')
+    if k < 0:
+        vowels = word.translate(RU_VOWEL_MARKS)  # every vowel becomes UNKNOWN, so str.rfind finds them
+        last = vowels.rfind(UNKNOWN)
+        if last < 0:
+            return word
+        k = vowels.rfind(UNKNOWN, 0, last)
+        if k < 0:
+            k = last
+    return word[:k + 1] + ACUTE + word[k + 1:]
+
+
+# --- Arabic ------------------------------------------------------------------
+
+FATHATAN, DAMMATAN, KASRATAN = 'ً', 'ٌ', 'ٍ'
+FATHA, DAMMA, KASRA, SHADDA, SUKUN = 'َ', 'ُ', 'ِ', 'ّ', 'ْ'
+DAGGER_ALEF, TATWEEL = 'ٰ', 'ـ'
+AR_CONSONANTS = {
+    'ب': 'B', 'ت': 'T', 'ث': 'TH', 'ج': 'JH', 'ح': 'H_AR', 'خ': 'KH', 'د': 'D', 'ذ': 'DH', 'ر': 'RR',
+    'ز': 'Z', 'س': 'S', 'ش': 'SH', 'ص': 'S_AR', 'ض': 'D_AR', 'ط': 'T_AR', 'ظ': 'Z_AR', 'ع': 'AIN',
+    'غ': 'GH', 'ف': 'F', 'ق': 'Q', 'ك': 'K', 'ل': 'L', 'م': 'M', 'ن': 'N', 'ه': 'HH',
+}
+AR_SUN = 'تثدذرزسشصضطظلن'
+AR_HAMZA = 'ءأإآؤئ'
+AR_CLASSES = {
+    'C': ''.join(AR_CONSONANTS) + AR_HAMZA + 'وية',
+    'L': ''.join(AR_CONSONANTS) + AR_HAMZA + 'اوىية' + FATHATAN + DAMMATAN + KASRATAN + FATHA + DAMMA
+         + KASRA + SHADDA + SUKUN + DAGGER_ALEF,
+    'V': FATHATAN + DAMMATAN + KASRATAN + FATHA + DAMMA + KASRA + SHADDA,  # a vowel or gemination follows
+    'N': FATHATAN + DAMMATAN + KASRATAN + FATHA + DAMMA + KASRA + SHADDA + SUKUN + DAGGER_ALEF,  # any mark
+}
+AR_FREQUENT = FATHA + 'ال' + KASRA + 'يم' + DAMMA + SUKUN + 'ونرتبعهةدسفكقحجشطصذخثزضغظ' + SHADDA + 'ىأإآءؤئ'
+AR_VOWELIZE_RE = re.compile(f"(?<=[{''.join(AR_CONSONANTS)}{AR_HAMZA}])(?=[{''.join(AR_CONSONANTS)}{AR_HAMZA}])")
+AR_MARK_RE = re.compile(f"[{AR_CLASSES['N']}]")
+AR_SHADDA_RE = re.compile(f"([{FATHATAN}{DAMMATAN}{KASRATAN}{FATHA}{DAMMA}{KASRA}]){SHADDA}")
+
+AR_RULES = []
+# Definite article: the lam assimilates to a following sun letter, which is doubled
+for c in AR_SUN:
+    AR_RULES.append(('#', 'ال' + c + SHADDA, '', 'AE ' + AR_CONSONANTS[c] + ' ' + AR_CONSONANTS[c]))
+    AR_RULES.append(('#', 'ال' + c, '', 'AE ' + AR_CONSONANTS[c] + ' ' + AR_CONSONANTS[c]))
+AR_RULES += [
+    ('#', 'ال', '', 'AE L'),
+    # Hamza seats
+    ('', 'آ', '', 'Q AA'), ('', 'إ' + KASRA, '', 'Q IH'), ('', 'إ', '', 'Q IH'),
+    ('', 'أ', '', 'Q'), ('', 'ء', '', 'Q'), ('', 'ؤ', '', 'Q'), ('', 'ئ', '', 'Q'),
+    # Diphthongs and long vowels: the short vowel merges into the letter that lengthens it
+    ('', FATHA + 'و' + SUKUN, '', 'AW'), ('', FATHA + 'ي' + SUKUN, '', 'AY'),
+    ('', FATHA, '[اى]', ''), ('', DAMMA, 'و(?![{V}])', ''), ('', KASRA, 'ي(?![{V}])', ''),
+    # Tanwin (the alif that carries fathatan is silent)
+    ('', FATHATAN + 'ا', '', 'AE N'), ('', 'ا' + FATHATAN, '', 'AE N'),
+    ('', FATHATAN, '', 'AE N'), ('', DAMMATAN, '', 'UH N'), ('', KASRATAN, '', 'IH N'),
+    ('', FATHA, '', 'AE'), ('', DAMMA, '', 'UH'), ('', KASRA, '', 'IH'), ('', SUKUN, '', ''),
+    ('', DAGGER_ALEF, '', 'AA'),
+    # Alif: a bare initial one carries a short vowel, otherwise it is a long [a:]
+    ('#', 'ا', '', 'AE'), ('', 'ا', '', 'AA'), ('', 'ى', '', 'AA'),
+    # Waw and ya: consonants at word start or before a vowel or shadda, long vowels otherwise
+    ('', 'و' + SHADDA, '', 'W W'), ('', 'ي' + SHADDA, '', 'Y Y'),
+    ('#', 'و', '', 'W'), ('', 'و', '[{V}]', 'W'), ('', 'و', '', 'UW'),
+    ('#', 'ي', '', 'Y'), ('', 'ي', '[{V}]', 'Y'), ('', 'ي', '', 'IY'),
+    # Ta marbuta: [t] before a vowel, pausal [a] otherwise
+    ('', 'ة', '[{V}]', 'T'), ('', 'ة', '', 'AH'),
+]
+# Shadda doubles its consonant
+AR_RULES += [('', c + SHADDA, '', p + ' ' + p) for c, p in AR_CONSONANTS.items()]
+AR_RULES += [('', c, '', p) for c, p in AR_CONSONANTS.items()]
+
+
+def prepare_arabic(word):
+    """Drop tatweel, put shadda before the vowel mark, and give undiacritized words a default fatha"""
+    word = AR_SHADDA_RE.sub(SHADDA + r'\1', word.replace(TATWEEL, ''))
+    if not AR_MARK_RE.search(word):
+        start = 2 if word.startswith('ال') else 0
+        word = word[:start] + AR_VOWELIZE_RE.sub(FATHA, word[start:])
+    return word
+
+
+RUSSIAN = RuleSet('Russian', RU_RULES, RU_CLASSES, prepare_russian, RU_EXCEPTIONS, frequent=RU_FREQUENT)
+ARABIC = RuleSet('Arabic', AR_RULES, AR_CLASSES, prepare_arabic, frequent=AR_FREQUENT)
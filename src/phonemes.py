@@ -0,0 +1,180 @@
+"""
+Phoneme tables - compiles the dict tables in config.py into NumPy arrays
+indexed by an integer phoneme ID, plus the compact phoneme stream format
+that parse_text emits and generate_tracks consumes.
+"""
+
+import numpy as np
+
+from src.config import PHONEMES, DIPHTHONG_MAP, PLOSIVE_DATA
+
+# Phoneme types (column 6 of PHONEMES)
+TYPE_VOWEL = 0
+TYPE_FRIC = 1
+TYPE_STOP = 2
+TYPE_PAUSE = 3
+TYPE_VOICED_FRIC = 4
+TYPE_GLIDE = 5
+TYPE_VOWEL_LIKE = 6
+TYPE_MARKER = -1  # WORD_BOUNDARY / UNKNOWN: no audio, skipped by generate_tracks
+TYPE_NAMES = {
+    TYPE_VOWEL: 'vowel', TYPE_FRIC: 'fricative', TYPE_STOP: 'stop', TYPE_PAUSE: 'pause',
+    TYPE_VOICED_FRIC: 'voiced fricative', TYPE_GLIDE: 'glide', TYPE_VOWEL_LIKE: 'vowel-like',
+    TYPE_MARKER: 'marker',
+}
+
+# Stream item flags
+FLAG_SLOW = 1  # slow-language duration stretch (Arabic)
+
+# Compact phoneme stream: one record per item
+STREAM_DTYPE = np.dtype([
+    ('id', np.uint16),     # index into PHONEME_NAMES
+    ('dur', np.uint16),    # duration override in ms (PAUSE/BREATH/END_OF_STREAM)
+    ('stress', np.uint8),  # CMU stress digit
+    ('flags', np.uint8),   # FLAG_* bits
+])
+
+PHONEME_NAMES = list(PHONEMES) + ['WORD_BOUNDARY', 'UNKNOWN']
+PHONEME_ID = {name: i for i, name in enumerate(PHONEME_NAMES)}
+NUM_PHONEMES = len(PHONEME_NAMES)
+
+WORD_BOUNDARY_ID = PHONEME_ID['WORD_BOUNDARY']
+UNKNOWN_ID = PHONEME_ID['UNKNOWN']
+PAUSE_ID = PHONEME_ID['PAUSE']
+BREATH_ID = PHONEME_ID['BREATH']
+END_OF_STREAM_ID = PHONEME_ID['END_OF_STREAM']
+HH_ID = PHONEME_ID['HH']
+W_ID = PHONEME_ID['W']
+
+
+def _db_to_lin(db):
+    if db <= -90: return 0.0
+    return 10.0 ** (db / 20.0)
+
+
+def _excitation(ph, p_data):
+    """Voicing/frication amplitudes and noise band mix for a standard (non-glide, non-stop) phoneme"""
+    tgt_amp = _db_to_lin(p_data[5])
+    av, af = (0.0, 0.0)
+    if p_data[6] in [0, 6]: av = tgt_amp
+    elif p_data[6] == 1: af = tgt_amp
+    elif p_data[6] == 4: av = tgt_amp*0.5; af = tgt_amp*0.5
+    ms, mm, mh = 0, 0, 0
+    if ph in ['S','Z','S_AR']: ms=1
+    elif ph in ['SH','ZH']: mm=1
+    elif ph in ['HH','KH','H_AR']: mh=1
+    if ph in ['F', 'TH']: ms=0; mm=0.5; mh=0.5; af*=0.8
+    if ph in ['Z','Z_AR']: av=tgt_amp*0.8; af=tgt_amp*0.7; ms=1.0
+    if ph == 'V': av=tgt_amp*0.8; af=tgt_amp*0.5; mh=0.5; ms=0.2
+    if ph == 'GH': av=tgt_amp*0.8; af=tgt_amp*0.4; mh=0.8; ms=0.0
+    if ph == 'AIN': av=tgt_amp; af=0.0
+    if ph in ['KH','H_AR']: mm=0.5; af*=0.6
+    return av, af, (ms, mm, mh)
+
+
+def _aspiration_mix(asp):
+    if 'S' in asp: return (1, 0, 0)
+    elif 'SH' in asp: return (0, 1, 0)
+    return (0, 0, 1)
+
+
+def _compile():
+    t = {
+        'dur': np.zeros(NUM_PHONEMES),
+        'formants': np.zeros((NUM_PHONEMES, 4)),
+        'amp': np.zeros(NUM_PHONEMES),
+        'type': np.full(NUM_PHONEMES, TYPE_MARKER, dtype=np.int8),
+        'av': np.zeros(NUM_PHONEMES),
+        'af': np.zeros(NUM_PHONEMES),
+        'mix': np.zeros((NUM_PHONEMES, 3)),
+        # Glides: formant trajectory start/end (end for W is taken from the next phoneme)
+        'glide_start': np.zeros((NUM_PHONEMES, 4)),
+        'glide_end': np.zeros((NUM_PHONEMES, 4)),
+        # Plosives (unlisted stops fall back to 'T', as before)
+        'cl_ms': np.zeros(NUM_PHONEMES),
+        'burst': np.zeros(NUM_PHONEMES),
+        'vb': np.zeros(NUM_PHONEMES),
+        'loc_f2': np.zeros(NUM_PHONEMES),
+        'loc_f3': np.zeros(NUM_PHONEMES),
+        'asp_ms': np.zeros(NUM_PHONEMES),
+        'asp_mix': np.zeros((NUM_PHONEMES, 3)),
+    }
+    for ph, p_data in PHONEMES.items():
+        i = PHONEME_ID[ph]
+        t['dur'][i] = p_data[0]
+        t['formants'][i] = p_data[1:5]
+        t['amp'][i] = _db_to_lin(p_data[5])
+        t['type'][i] = p_data[6]
+        if p_data[6] == TYPE_GLIDE:
+            if ph in DIPHTHONG_MAP:
+                s_ph, e_ph = DIPHTHONG_MAP[ph]
+                t['glide_start'][i] = PHONEMES[s_ph][1:5]; t['glide_end'][i] = PHONEMES[e_ph][1:5]
+            else:
+                t['glide_start'][i] = p_data[1:5]; t['glide_end'][i] = p_data[1:5]
+        elif p_data[6] == TYPE_STOP:
+            dat = PLOSIVE_DATA[ph if ph in PLOSIVE_DATA else 'T']
+            t['cl_ms'][i] = dat['cl']
+            t['burst'][i] = dat['burst']
+            t['vb'][i] = dat['vb']
+            t['loc_f2'][i] = dat['loc_f2']; t['loc_f3'][i] = dat['loc_f3']
+            if dat['asp']:
+                t['asp_ms'][i] = 30 if dat['asp'] != 'SH_HARD' else 120
+                t['asp_mix'][i] = _aspiration_mix(dat['asp'])
+        else:
+            av, af, mix = _excitation(ph, p_data)
+            t['av'][i] = av; t['af'][i] = af; t['mix'][i] = mix
+    for arr in t.values():
+        arr.flags.writeable = False
+    return t
+
+
+TABLES = _compile()
+
+PHONEME_DUR = TABLES['dur']
+PHONEME_FORMANTS = TABLES['formants']
+PHONEME_AMP = TABLES['amp']
+PHONEME_TYPE = TABLES['type']
+PHONEME_AV = TABLES['av']
+PHONEME_AF = TABLES['af']
+PHONEME_MIX = TABLES['mix']
+GLIDE_START = TABLES['glide_start']
+GLIDE_END = TABLES['glide_end']
+PLOSIVE_CL_MS = TABLES['cl_ms']
+PLOSIVE_BURST = TABLES['burst']
+PLOSIVE_VB = TABLES['vb']
+PLOSIVE_LOC_F2 = TABLES['loc_f2']
+PLOSIVE_LOC_F3 = TABLES['loc_f3']
+PLOSIVE_ASP_MS = TABLES['asp_ms']
+PLOSIVE_ASP_MIX = TABLES['asp_mix']
+
+# IDs that force a chunk boundary in the synthesis batcher
+MANDATORY_BREAK = np.zeros(NUM_PHONEMES, dtype=bool)
+MANDATORY_BREAK[[PAUSE_ID, BREATH_ID, END_OF_STREAM_ID]] = True
+MANDATORY_BREAK.flags.writeable = False
+
+
+def phoneme_id(name):
+    """Integer ID for a phoneme name (UNKNOWN_ID if not in the tables)"""
+    return PHONEME_ID.get(name, UNKNOWN_ID)
+
+
+def make_stream(items):
+    """Build a compact stream from (id, dur, stress, flags) tuples"""
+    return np.array(items, dtype=STREAM_DTYPE)
+
+
+def encode_stream(items):
+    """Convert legacy tuple items like ('AA', 0, 1, False) / ('PAUSE', 45, 0) to a compact stream"""
+    rows = []
+    for item in items:
+        flags = FLAG_SLOW if len(item) > 3 and item[3] else 0
+        rows.append((phoneme_id(item[0]), item[1], item[2], flags))
+    return make_stream(rows)
+
+
+def decode_stream(stream):
+    """Inverse of encode_stream, for debugging and inspection"""
+    out = []
+    for pid, dur, stress, flags in stream.tolist():
+        out.append((PHONEME_NAMES[pid], dur, stress, bool(flags & FLAG_SLOW)))
+    return out
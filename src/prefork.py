@@ -0,0 +1,324 @@
+"""
+Pre-fork server - warm once, fork cheap workers
+The parent imports everything, loads G2P, prepares every voice, renders a
+warm-up phrase (filter design caches, lazy G2P models, Numba kernels) and
+freezes the GC, then forks workers that inherit all of it copy-on-write. A
+worker is retired after max_jobs renders and replaced by a fresh fork of the
+still-warm parent, so a new worker costs milliseconds, not an import + JIT.
+
+Workers are forked by a fork server: a copy of the warm parent made in start()
+before the dispatcher thread exists. It stays single-threaded, so no fork
+happens in a process with running threads (whose locks a child could inherit
+held). The parent passes it the worker's end of a pipe and gets the pid back.
+
+Linux/macOS only (needs fork). Per-worker memory comes from
+/proc/<pid>/smaps_rollup and is None where that is unavailable.
+"""
+
+import os
+import gc
+import time
+import signal
+import threading
+import itertools
+import multiprocessing as mp
+from multiprocessing import reduction
+from multiprocessing.connection import wait, Connection
+from collections import deque
+from concurrent.futures import Future
+
+from src.config import DEFAULT_QUALITY
+from src.voice_pool import VoicePool
+from src import engine as engine_module
+
+WARMUP_TEXT = "Hello, warm up."
+
+
+def process_memory(pid):
+    """
+    Memory of a process in bytes: rss, pss, shared (pages also mapped by other
+    processes, e.g. inherited from the parent) and private. None if unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    except OSError:
+        return None
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def _worker_main(conn, pool):
+    """Render jobs from the parent until told to stop (None) or the pipe closes"""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        job_id, voice, text, kwargs = job
+        try:
+            audio = pool.engine(voice).render(text, **kwargs)
+        except Exception as e:
+            conn.send((job_id, False, f"{type(e).__name__}: {e}"))
+        else:
+            conn.send((job_id, True, audio))
+    conn.close()
+
+
+def _fork_server(ctl, pool):
+    """Fork a worker for each pipe end received on ctl and reply with its pid, until ctl closes"""
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # exited workers are reaped by the kernel
+    while True:
+        try:
+            fd = reduction.recv_handle(ctl)
+        except (EOFError, OSError):
+            break
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                ctl.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                _worker_main(Connection(fd), pool)
+                code = 0
+            finally:
+                os._exit(code)
+        os.close(fd)
+        ctl.send(pid)
+    ctl.close()
+
+
+def _wait_exit(conn, timeout):
+    """Wait until the worker behind conn has closed its end (exited); False on timeout"""
+    deadline = time.monotonic() + timeout
+    while conn.poll(max(0.0, deadline - time.monotonic())):
+        try:
+            conn.recv()  # a reply still in flight
+        except (EOFError, OSError):
+            return True
+    return False
+
+
+class _Worker:
+    def __init__(self, pid, conn, spawn_ms):
+        self.pid = pid
+        self.conn = conn
+        self.spawn_ms = spawn_ms
+        self.jobs = 0
+        self.job_id = None  # job in flight
+
+
+class PreforkServer:
+    def __init__(self, voices, workers=2, max_jobs=500, quality=DEFAULT_QUALITY):
+        """
+        Args:
+            voices: Mapping of voice key -> profile (dict or VoiceRegistry)
+            workers: Number of worker processes
+            max_jobs: Renders per worker before it is recycled (None = never)
+            quality: Quality tier of the pooled engines
+        """
+        self.pool = VoicePool(voices, quality=quality)
+        self.n_workers = workers
+        self.max_jobs = max_jobs
+        self._ctx = mp.get_context('fork')
+        self._workers = []
+        self._idle = deque()
+        self._pending = deque()
+        self._futures = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = self._ctx.Pipe(duplex=False)
+        self._forker = None  # fork server process and its control pipe
+        self._forker_conn = None
+        self._thread = None
+        self._running = False
+        self.spawned = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.spawn_ms = deque(maxlen=1000)
+        self.warm_s = None
+
+    def warm(self, keys=None, text=WARMUP_TEXT):
+        """Load and prime everything the workers will inherit"""
+        t0 = time.perf_counter()
+        keys = list(self.pool.voices) if keys is None else list(keys)
+        for key in keys:
+            self.pool.engine(key).render(text)
+        if keys and engine_module.NUMBA_AVAILABLE:
+            self.pool.engine(keys[0]).render_batch([text])  # compiles the batch kernel
+        # Keep the warmed heap out of GC passes, so workers do not dirty those pages
+        gc.collect()
+        gc.freeze()
+        self.warm_s = time.perf_counter() - t0
+        return self
+
+    def start(self):
+        if self._running:
+            return self
+        if self.warm_s is None:
+            self.warm()
+        # Fork the fork server while this process still has no dispatcher thread
+        self._forker_conn, child_ctl = self._ctx.Pipe()
+        self._forker = self._ctx.Process(target=_fork_server, args=(child_ctl, self.pool),
+                                         name="tailsafety-forkserver", daemon=True)
+        self._forker.start()
+        child_ctl.close()
+        for _ in range(self.n_workers):
+            self._spawn()
+        self._running = True
+        self._thread = threading.Thread(target=self._dispatch, name="tailsafety-prefork", daemon=True)
+        self._thread.start()
+        return self
+
+    def _spawn(self):
+        t0 = time.perf_counter()
+        parent_conn, child_conn = self._ctx.Pipe()
+        reduction.send_handle(self._forker_conn, child_conn.fileno(), self._forker.pid)
+        pid = self._forker_conn.recv()
+        child_conn.close()
+        spawn_ms = (time.perf_counter() - t0) * 1000.0
+        worker = _Worker(pid, parent_conn, spawn_ms)
+        self._workers.append(worker)
+        self._idle.append(worker)
+        self.spawned += 1
+        self.spawn_ms.append(spawn_ms)
+        return worker
+
+    def _retire(self, worker, replace=True):
+        try:
+            worker.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        if not _wait_exit(worker.conn, 5):
+            try:
+                os.kill(worker.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        worker.conn.close()
+        self._workers.remove(worker)
+        if worker in self._idle:
+            self._idle.remove(worker)
+        if replace and self._running:
+            self._spawn()
+
+    def submit(self, voice, text, **kwargs):
+        """Queue a render (kwargs as for TailSafetyEngine.render); returns a Future"""
+        if not self._running:
+            raise RuntimeError("PreforkServer is not running; call start() first")
+        if voice not in self.pool:
+            raise ValueError(f"Voice '{voice}' not found")
+        future = Future()
+        with self._lock:
+            job_id = next(self._ids)
+            self._futures[job_id] = future
+            self._pending.append((job_id, voice, text, kwargs))
+        self._wake_w.send(None)
+        return future
+
+    def render(self, voice, text, **kwargs):
+        return self.submit(voice, text, **kwargs).result()
+
+    def _dispatch(self):
+        while self._running:
+            busy = [w.conn for w in self._workers if w.job_id is not None]
+            for conn in wait(busy + [self._wake_r], timeout=0.5):
+                if conn is self._wake_r:
+                    while self._wake_r.poll():
+                        self._wake_r.recv()
+                    continue
+                worker = next(w for w in self._workers if w.conn is conn)
+                self._collect(worker)
+            with self._lock:
+                while self._pending and self._idle:
+                    worker = self._idle.popleft()
+                    job = self._pending.popleft()
+                    worker.job_id = job[0]
+                    try:
+                        worker.conn.send(job)
+                    except (OSError, BrokenPipeError):
+                        self._fail(worker, "worker pipe closed")
+
+    def _collect(self, worker):
+        try:
+            job_id, ok, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            self._fail(worker, f"worker {worker.pid} exited")
+            return
+        future = self._futures.pop(job_id)
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+        worker.job_id = None
+        worker.jobs += 1
+        if self.max_jobs is not None and worker.jobs >= self.max_jobs:
+            self.recycled += 1
+            self._retire(worker)
+        else:
+            self._idle.append(worker)
+
+    def _fail(self, worker, reason):
+        self.crashed += 1
+        future = self._futures.pop(worker.job_id, None)
+        if future is not None:
+            future.set_exception(RuntimeError(reason))
+        worker.job_id = None
+        self._retire(worker)
+
+    def memory(self):
+        """process_memory() of the parent and of every worker, keyed by pid"""
+        pids = [os.getpid()] + [w.pid for w in list(self._workers)]
+        return {pid: process_memory(pid) for pid in pids}
+
+    def stats(self):
+        spawn = list(self.spawn_ms)
+        return {
+            'workers': len(self._workers),
+            'spawned': self.spawned,
+            'recycled': self.recycled,
+            'crashed': self.crashed,
+            'pending': len(self._pending),
+            'warm_s': self.warm_s,
+            'spawn_ms_mean': sum(spawn) / len(spawn) if spawn else 0.0,
+            'spawn_ms_max': max(spawn) if spawn else 0.0,
+            'jobs_per_worker': {w.pid: w.jobs for w in list(self._workers)},
+        }
+
+    def stop(self):
+        """Stop dispatching, fail queued jobs and shut the workers down"""
+        if not self._running:
+            return
+        self._running = False
+        self._wake_w.send(None)
+        self._thread.join()
+        for worker in list(self._workers):
+            self._retire(worker, replace=False)
+        self._forker_conn.close()
+        self._forker.join(timeout=5)
+        if self._forker.is_alive():
+            self._forker.kill()
+            self._forker.join()
+        self._forker = self._forker_conn = None
+        with self._lock:
+            for job in self._pending:
+                self._futures.pop(job[0]).set_exception(RuntimeError("PreforkServer stopped"))
+            self._pending.clear()
+        for future in self._futures.values():
+            future.set_exception(RuntimeError("PreforkServer stopped"))
+        self._futures.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,268 @@
+"""
+Prompt Pack - precompiled audio for fixed prompt sets
+A pack holds one voice's renders of a list of phrases: a header, an index
+(text hash -> offset/length) and contiguous float32 PCM. Packs are opened with
+mmap, so worker processes share the pages and a lookup is a zero-copy slice.
+
+Layout (little endian):
+    header   PACK_HEADER
+    index    count x INDEX_DTYPE, sorted by hash
+    texts    UTF-8 phrase texts (for inspect/verify)
+    padding  to a 16-byte boundary
+    pcm      float32 samples
+
+Command line:
+    python -m src.prompt_pack build  OUT.tspk --voice NAME --phrases FILE [--quality Q] [--seed N]
+    python -m src.prompt_pack inspect PACK
+    python -m src.prompt_pack verify  PACK [--rerender]
+"""
+
+import os
+import mmap
+import zlib
+import struct
+import hashlib
+import argparse
+
+import numpy as np
+
+from src.render_cache import normalize_text
+
+PACK_MAGIC = b'TSPK'
+PACK_VERSION = 1
+# magic, version, reserved, sample_rate, count, seed (-1 = unseeded), voice hash, quality
+PACK_HEADER = struct.Struct('<4sHHIIq40s16s')
+INDEX_DTYPE = np.dtype([
+    ('hash', 'S20'),         # sha1 of the normalized text
+    ('offset', '<u8'),       # byte offset of the PCM in the file
+    ('length', '<u8'),       # number of float32 samples
+    ('text_offset', '<u8'),  # byte offset of the UTF-8 text
+    ('text_length', '<u4'),
+    ('crc', '<u4'),          # crc32 of the PCM bytes
+])
+PCM_DTYPE = np.dtype('<f4')
+
+
+def text_hash(text):
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).digest()
+
+
+def build_pack(path, engine, phrases, quality=None, seed=0):
+    """
+    Render phrases with engine and write them to a pack at path.
+    A seed makes the pack reproducible, which verify(rerender=True) relies on.
+    Duplicate phrases (after normalization) are stored once.
+    """
+    quality = quality or engine.quality
+    entries = {}
+    for text in phrases:
+        h = text_hash(text)
+        if h in entries:
+            continue
+        audio = np.ascontiguousarray(engine.render(text, quality=quality, seed=seed), dtype=PCM_DTYPE)
+        entries[h] = (text, audio)
+
+    hashes = sorted(entries)
+    texts = [entries[h][0].encode('utf-8') for h in hashes]
+    index = np.zeros(len(hashes), dtype=INDEX_DTYPE)
+    text_start = PACK_HEADER.size + index.nbytes
+    pos = text_start
+    for i, t in enumerate(texts):
+        index[i]['text_offset'] = pos
+        index[i]['text_length'] = len(t)
+        pos += len(t)
+    pcm_start = (pos + 15) // 16 * 16
+    pos = pcm_start
+    for i, h in enumerate(hashes):
+        audio = entries[h][1]
+        index[i]['hash'] = h
+        index[i]['offset'] = pos
+        index[i]['length'] = len(audio)
+        index[i]['crc'] = zlib.crc32(audio.tobytes())
+        pos += audio.nbytes
+
+    header = PACK_HEADER.pack(
+        PACK_MAGIC, PACK_VERSION, 0, engine.fs, len(hashes), -1 if seed is None else seed,
+        engine.voice.profile_hash.encode('ascii'), quality.encode('ascii'),
+    )
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(index.tobytes())
+        for t in texts:
+            f.write(t)
+        f.write(b'\0' * (pcm_start - f.tell()))
+        for h in hashes:
+            f.write(entries[h][1].tobytes())
+    os.replace(tmp, path)
+    return len(hashes)
+
+
+class PromptPack:
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{self.path} is empty, not a prompt pack")
+        if len(self._mm) < PACK_HEADER.size:
+            self.close()
+            raise ValueError(f"{self.path} is too short to be a prompt pack")
+        magic, version, _, sr, count, seed, voice_hash, quality = PACK_HEADER.unpack_from(self._mm, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {PACK_VERSION} prompt pack")
+        self.sample_rate = sr
+        self.seed = None if seed < 0 else seed
+        self.voice_hash = voice_hash.decode('ascii')
+        self.quality = quality.rstrip(b'\0').decode('ascii')
+        try:
+            self.index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=count, offset=PACK_HEADER.size)
+        except ValueError:
+            self.close()
+            raise ValueError(f"{self.path} is truncated: index of {count} entries runs past end of file")
+        self._lookup = {h: i for i, h in enumerate(self.index['hash'].tolist())}
+
+    def get(self, text):
+        """Zero-copy read-only float32 view of the audio for text, or None"""
+        i = self._lookup.get(text_hash(text))
+        if i is None:
+            return None
+        return self._entry_audio(i)
+
+    def _entry_audio(self, i):
+        e = self.index[i]
+        return np.frombuffer(self._mm, dtype=PCM_DTYPE, count=int(e['length']), offset=int(e['offset']))
+
+    def text(self, i):
+        e = self.index[i]
+        start = int(e['text_offset'])
+        return self._mm[start:start + int(e['text_length'])].decode('utf-8')
+
+    def texts(self):
+        return [self.text(i) for i in range(len(self.index))]
+
+    def verify(self, engine=None):
+        """
+        Check bounds and CRCs of every entry; with an engine, also re-render each
+        phrase (pack seed and quality) and compare sample for sample. The
+        engine's prompt packs are detached meanwhile, so it really synthesizes.
+        Returns a list of problem descriptions (empty = pack is good).
+        """
+        if engine is not None:
+            packs, engine.prompt_packs = engine.prompt_packs, []
+            try:
+                return self._verify_entries(engine)
+            finally:
+                engine.prompt_packs = packs
+        return self._verify_entries()
+
+    def _verify_entries(self, engine=None):
+        problems = []
+        size = len(self._mm)
+        for i, e in enumerate(self.index):
+            name = repr(self.text(i)) if int(e['text_offset']) + int(e['text_length']) <= size else f"entry {i}"
+            end = int(e['offset']) + int(e['length']) * PCM_DTYPE.itemsize
+            if end > size:
+                problems.append(f"{name}: PCM runs past end of file")
+                continue
+            audio = self._entry_audio(i)
+            if zlib.crc32(audio.tobytes()) != int(e['crc']):
+                problems.append(f"{name}: CRC mismatch")
+            if engine is not None:
+                fresh = engine.render(self.text(i), quality=self.quality, seed=self.seed)
+                if not np.array_equal(fresh.astype(PCM_DTYPE), audio):
+                    problems.append(f"{name}: differs from a fresh render")
+        return problems
+
+    def __contains__(self, text):
+        return text_hash(text) in self._lookup
+
+    def __len__(self):
+        return len(self._lookup)
+
+    def close(self):
+        """Release the mapping; views handed out by get() keep it alive until they are dropped"""
+        self.index = None
+        self._lookup = {}
+        try:
+            self._mm.close()
+        except (BufferError, AttributeError):
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _engine_for(voice_name, voices_dir, quality):
+    from src import config
+    from src.engine import TailSafetyEngine
+    from src.voice_loader import VoiceRegistry, get_voice_by_name
+
+    voices = VoiceRegistry(voices_dir) if os.path.isdir(voices_dir) else {}
+    if not len(voices):
+        voices = config.VOICE_PROFILES
+    key, profile = get_voice_by_name(voices, voice_name)
+    if key is None and voice_name in voices:
+        profile = voices[voice_name]
+    if profile is None:
+        raise SystemExit(f"Voice '{voice_name}' not found")
+    return TailSafetyEngine(voice_profile=profile, quality=quality or config.DEFAULT_QUALITY)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.prompt_pack", description="Build, inspect and verify prompt packs")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('build', help="render phrases (one per line) into a pack")
+    p.add_argument('out')
+    p.add_argument('--voice', required=True, help="voice name (see /voices in main.py)")
+    p.add_argument('--phrases', required=True, help="UTF-8 text file, one phrase per line")
+    p.add_argument('--voices-dir', default='Voices')
+    p.add_argument('--quality', default=None)
+    p.add_argument('--seed', type=int, default=0)
+    p = sub.add_parser('inspect', help="print header and entries")
+    p.add_argument('pack')
+    p = sub.add_parser('verify', help="check an existing pack")
+    p.add_argument('pack')
+    p.add_argument('--rerender', action='store_true', help="also compare against fresh renders")
+    p.add_argument('--voice', help="voice to re-render with (required with --rerender)")
+    p.add_argument('--voices-dir', default='Voices')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'build':
+        with open(args.phrases, encoding='utf-8') as f:
+            phrases = [line.strip() for line in f if line.strip()]
+        engine = _engine_for(args.voice, args.voices_dir, args.quality)
+        n = build_pack(args.out, engine, phrases, quality=args.quality, seed=args.seed)
+        print(f"Wrote {n} prompts to {args.out}")
+        return 0
+
+    with PromptPack(args.pack) as pack:
+        if args.cmd == 'inspect':
+            print(f"{args.pack}: {len(pack)} prompts, {pack.sample_rate} Hz, quality={pack.quality}, "
+                  f"seed={pack.seed}, voice hash={pack.voice_hash[:12]}")
+            for i, e in enumerate(pack.index):
+                print(f"  {int(e['length']) / pack.sample_rate:7.2f}s  {pack.text(i)}")
+            return 0
+        engine = None
+        if args.rerender:
+            if not args.voice:
+                raise SystemExit("--rerender needs --voice")
+            engine = _engine_for(args.voice, args.voices_dir, pack.quality)
+            if engine.voice.profile_hash != pack.voice_hash:
+                raise SystemExit(f"Voice '{args.voice}' does not match the pack's voice")
+        problems = pack.verify(engine)
+        for problem in problems:
+            print(f"  {problem}")
+        print(f"{args.pack}: {'OK' if not problems else f'{len(problems)} problem(s)'}")
+        return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
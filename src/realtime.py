@@ -0,0 +1,274 @@
+"""
+Realtime output - callback-driven playback with a jitter buffer
+The synthesizer writes chunks into a JitterBuffer; the audio callback pulls
+fixed-size blocks from it. Playback starts once jitter_ms of audio is buffered.
+On an underrun the callback fades out what is left and plays silence, then
+waits for the buffer to refill before fading back in, so a late chunk is heard
+as a short gap instead of a glitch.
+
+Backends:
+    'sounddevice'  the default output device (sounddevice callback stream)
+    'null'         a virtual device clocked by a thread at simulated real time
+                   (speed > 1 runs faster), for CI and headless boxes
+"""
+
+import time
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.config import SAMPLE_RATE
+
+HIST_BIN_MS = 5
+
+
+class JitterBuffer:
+    def __init__(self, capacity):
+        """Single-producer / single-consumer float32 FIFO of capacity samples"""
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._read = 0   # total samples read
+        self._write = 0  # total samples written
+        self.cond = threading.Condition()
+
+    @property
+    def level(self):
+        return self._write - self._read
+
+    def put(self, chunk, timeout=None):
+        """Append chunk, waiting for space; returns False if timeout expired first"""
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        pos = 0
+        with self.cond:
+            while pos < len(chunk):
+                if not self.cond.wait_for(lambda: self.level < self.capacity, timeout):
+                    return False
+                n = min(len(chunk) - pos, self.capacity - self.level)
+                start = self._write % self.capacity
+                head = min(n, self.capacity - start)
+                self._data[start:start + head] = chunk[pos:pos + head]
+                self._data[:n - head] = chunk[pos + head:pos + n]
+                self._write += n
+                pos += n
+                self.cond.notify_all()
+        return True
+
+    def get_into(self, out):
+        """Move up to len(out) samples into out; returns the count"""
+        with self.cond:
+            n = min(len(out), self.level)
+            start = self._read % self.capacity
+            head = min(n, self.capacity - start)
+            out[:head] = self._data[start:start + head]
+            out[head:n] = self._data[:n - head]
+            self._read += n
+            self.cond.notify_all()
+        return n
+
+    def clear(self):
+        with self.cond:
+            self._read = self._write
+            self.cond.notify_all()
+
+
+class SoundDeviceBackend:
+    """Default output device through a sounddevice callback stream"""
+
+    def __init__(self, device=None, latency='low'):
+        self.device = device
+        self.latency = latency
+        self._stream = None
+
+    def start(self, fs, blocksize, callback):
+        try:
+            import sounddevice as sd
+            self._stream = sd.OutputStream(samplerate=fs, blocksize=blocksize, channels=1, dtype='float32',
+                                           device=self.device, latency=self.latency, callback=callback)
+            self._stream.start()
+        except Exception as e:  # PortAudioError, or OSError when PortAudio is missing
+            self._stream = None
+            raise RuntimeError(f"Could not open audio stream: {e}") from e
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class NullBackend:
+    """
+    Virtual device: a thread calls the callback every blocksize samples of
+    simulated time. With record=True the played blocks are kept in .recorded.
+    """
+
+    def __init__(self, speed=1.0, latency_ms=None, record=False):
+        self.speed = speed
+        self.latency_ms = latency_ms
+        self.record = record
+        self.recorded = []
+        self._thread = None
+        self._running = False
+
+    def start(self, fs, blocksize, callback):
+        period = blocksize / fs
+        latency = period if self.latency_ms is None else self.latency_ms / 1000.0
+        self._running = True
+
+        def run():
+            next_t = time.monotonic()
+            out = np.zeros((blocksize, 1), dtype=np.float32)
+            while self._running:
+                now = time.monotonic()
+                callback(out, blocksize, SimpleNamespace(currentTime=now, outputBufferDacTime=now + latency), None)
+                if self.record:
+                    self.recorded.append(out[:, 0].copy())
+                next_t += period / self.speed
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_t = time.monotonic()  # fell behind: do not try to catch up in a burst
+
+        self._thread = threading.Thread(target=run, name="tailsafety-null-device", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+BACKENDS = {'sounddevice': SoundDeviceBackend, 'null': NullBackend}
+
+
+class RealtimePlayer:
+    def __init__(self, fs=SAMPLE_RATE, jitter_ms=80, blocksize=None, backend='sounddevice',
+                 fade_ms=5, capacity_ms=None, write_timeout=None):
+        """
+        Args:
+            fs: Sample rate
+            jitter_ms: Audio buffered before playback starts (and restarts after an underrun)
+            blocksize: Samples per callback (default 10 ms)
+            backend: 'sounddevice', 'null', or a backend object with start(fs, blocksize, callback)/stop()
+            fade_ms: Fade length used around underruns
+            capacity_ms: Jitter buffer size (default max(4 * jitter_ms, 500))
+            write_timeout: Seconds write() waits for buffer space before giving up
+                           (default twice the buffer length, at least 1 s)
+        """
+        self.fs = fs
+        self.blocksize = blocksize or fs // 100
+        self.target = int(fs * jitter_ms / 1000)
+        capacity = int(fs * (capacity_ms or max(4 * jitter_ms, 500)) / 1000)
+        self.buffer = JitterBuffer(max(capacity, self.target + self.blocksize))
+        self.write_timeout = write_timeout or max(1.0, 2.0 * self.buffer.capacity / fs)
+        self.backend = BACKENDS[backend]() if isinstance(backend, str) else backend
+        self.fade = max(1, int(fs * fade_ms / 1000))
+        self._ramp = np.linspace(1.0, 0.0, self.fade, dtype=np.float32)
+        self._playing = False  # False while (re)buffering
+        self._draining = False
+        self._fade_in = False
+        self._started = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        n_bins = self.buffer.capacity * 1000 // (self.fs * HIST_BIN_MS) + 1
+        self.underruns = 0          # callbacks that ran dry mid-stream
+        self.underrun_samples = 0   # samples replaced by silence
+        self.device_underflows = 0  # reported by the device itself
+        self.callbacks = 0
+        self.level_hist = np.zeros(n_bins, dtype=np.int64)  # buffer level at each callback, HIST_BIN_MS bins
+        self.latencies = deque(maxlen=10000)  # callback -> DAC time of the block's first sample, seconds
+
+    def _callback(self, outdata, frames, time_info, status):
+        out = outdata[:, 0]
+        self.callbacks += 1
+        if status is not None and getattr(status, 'output_underflow', False):
+            self.device_underflows += 1
+        level = self.buffer.level
+        if self._playing or level:  # idle callbacks between utterances are not measured
+            self.level_hist[min(level * 1000 // (self.fs * HIST_BIN_MS), len(self.level_hist) - 1)] += 1
+            if time_info is not None:
+                self.latencies.append(time_info.outputBufferDacTime - time_info.currentTime)
+
+        if not self._playing:
+            if level >= self.target or (self._draining and level > 0):
+                self._playing = True
+            else:
+                out[:] = 0.0
+                return
+        n = self.buffer.get_into(out)
+        if self._fade_in and n:
+            k = min(n, self.fade)
+            out[:k] *= self._ramp[::-1][:k]
+            self._fade_in = False
+        if n < frames:
+            # Ran dry: fade out the tail we have, then silence until refilled
+            k = min(n, self.fade)
+            if k:
+                out[n - k:n] *= self._ramp[self.fade - k:]
+            out[n:] = 0.0
+            self._playing = False
+            if not self._draining:
+                self.underruns += 1
+                self.underrun_samples += frames - n
+                self._fade_in = True
+
+    def start(self):
+        if not self._started:
+            self.backend.start(self.fs, self.blocksize, self._callback)
+            self._started = True
+        return self
+
+    def write(self, chunk):
+        """
+        Queue a float32 chunk, blocking while the jitter buffer is full.
+        Raises RuntimeError if no space frees up for write_timeout seconds (the
+        device stopped pulling audio, e.g. after a device error).
+        """
+        if not self._started:
+            self.start()
+        self._draining = False
+        if not self.buffer.put(chunk, timeout=self.write_timeout):
+            raise RuntimeError(f"Audio device stopped consuming: jitter buffer full for {self.write_timeout:.1f} s")
+
+    def drain(self, timeout=None):
+        """Play out everything queued (also if less than jitter_ms); returns False on timeout"""
+        self._draining = True
+        with self.buffer.cond:
+            done = self.buffer.cond.wait_for(lambda: self.buffer.level == 0, timeout)
+        # Let the device play the last block before returning
+        time.sleep(self.blocksize / self.fs)
+        return done
+
+    def stop(self):
+        if self._started:
+            self.backend.stop()
+            self._started = False
+        self.buffer.clear()
+        self._playing = False
+
+    def stats(self):
+        """Underrun counters, level histogram (HIST_BIN_MS bins) and latency summary in ms"""
+        lat = np.array(self.latencies) * 1000.0
+        return {
+            'callbacks': self.callbacks,
+            'underruns': self.underruns,
+            'underrun_ms': self.underrun_samples * 1000.0 / self.fs,
+            'device_underflows': self.device_underflows,
+            'level_hist_ms': {i * HIST_BIN_MS: int(c) for i, c in enumerate(self.level_hist) if c},
+            'latency_ms': {
+                'mean': float(lat.mean()) if len(lat) else 0.0,
+                'p95': float(np.percentile(lat, 95)) if len(lat) else 0.0,
+                'max': float(lat.max()) if len(lat) else 0.0,
+            },
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
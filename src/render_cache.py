@@ -0,0 +1,164 @@
+"""
+Render Cache - rendered-utterance cache for repeated short prompts
+Keyed on (normalized text, voice profile hash, sample rate, quality tier, seed).
+Each entry keeps the chunk boundaries it was streamed with, so a hit can be
+replayed chunk for chunk.
+Memory is bounded by a byte budget with LRU eviction; evicted entries can spill
+to a directory on disk and are promoted back on the next hit.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+
+def normalize_text(text):
+    """Case- and whitespace-insensitive form of text (G2P ignores both)"""
+    return ' '.join(text.split()).casefold()
+
+
+def make_key(text, voice_hash, sample_rate, quality, seed=None):
+    """Cache key for one utterance"""
+    raw = '\x1f'.join([normalize_text(text), voice_hash, str(sample_rate), str(quality), str(seed)])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, spill_dir=None, spill_max_bytes=None):
+        """
+        Args:
+            max_bytes: Memory budget for cached audio
+            spill_dir: Directory that receives entries evicted from memory (None = no spill)
+            spill_max_bytes: Disk budget for spilled entries (None = unbounded)
+        """
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_max_bytes = spill_max_bytes
+        self._mem = OrderedDict()   # key -> (float32 array, chunk end offsets), most recently used last
+        self._mem_bytes = 0
+        self._disk = OrderedDict()  # key -> file size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'spills': 0}
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            files = sorted(self.spill_dir.glob('*.npz'), key=lambda f: f.stat().st_mtime)
+            for f in files:
+                size = f.stat().st_size
+                self._disk[f.stem] = size
+                self._disk_bytes += size
+
+    def _spill_path(self, key):
+        return self.spill_dir / f"{key}.npz"
+
+    def get(self, key):
+        """Cached audio for key (one read-only array), or None"""
+        entry = self._lookup(key)
+        return None if entry is None else entry[0]
+
+    def get_chunks(self, key):
+        """Cached audio for key as read-only views split at the stored chunk boundaries, or None"""
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        audio, ends = entry
+        return np.split(audio, ends) if len(audio) else []
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry
+            if key in self._disk:
+                try:
+                    with np.load(self._spill_path(key)) as spilled:
+                        entry = (spilled['audio'], spilled['ends'])
+                except (OSError, ValueError, KeyError):
+                    self._drop_disk(key)
+                else:
+                    entry[0].flags.writeable = False  # frozen like put() entries
+                    self._drop_disk(key)
+                    self._stats['disk_hits'] += 1
+                    self._insert(key, entry)
+                    return entry
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key, audio, chunk_ends=None):
+        """
+        Store audio (copied to a read-only float32 array) under key.
+        chunk_ends are the offsets where the chunks it was streamed as end (the
+        last one excluded, as for np.split); None stores it as one chunk.
+        """
+        audio = np.array(audio, dtype=np.float32)
+        if audio.nbytes > self.max_bytes:
+            return
+        audio.flags.writeable = False
+        ends = np.array(chunk_ends if chunk_ends is not None else [], dtype=np.int64)
+        with self._lock:
+            if key in self._mem:
+                self._mem_bytes -= self._mem.pop(key)[0].nbytes
+            self._insert(key, (audio, ends))
+
+    def _insert(self, key, entry):
+        self._mem[key] = entry
+        self._mem_bytes += entry[0].nbytes
+        while self._mem_bytes > self.max_bytes and self._mem:
+            old_key, old = self._mem.popitem(last=False)
+            self._mem_bytes -= old[0].nbytes
+            self._stats['evictions'] += 1
+            self._spill(old_key, old)
+
+    def _spill(self, key, entry):
+        if not self.spill_dir or key in self._disk:
+            return
+        path = self._spill_path(key)
+        try:
+            np.savez(path, audio=entry[0], ends=entry[1])
+        except OSError:
+            return
+        size = path.stat().st_size
+        self._disk[key] = size
+        self._disk_bytes += size
+        self._stats['spills'] += 1
+        while self.spill_max_bytes is not None and self._disk_bytes > self.spill_max_bytes and self._disk:
+            self._drop_disk(next(iter(self._disk)))
+
+    def _drop_disk(self, key):
+        self._disk_bytes -= self._disk.pop(key)
+        try:
+            os.remove(self._spill_path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Empty memory and disk tiers"""
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+            for key in list(self._disk):
+                self._drop_disk(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._mem or key in self._disk
+
+    def __len__(self):
+        with self._lock:
+            return len(self._mem) + len(self._disk)
+
+    def stats(self):
+        """Counters plus current sizes; hit_rate counts memory and disk hits"""
+        with self._lock:
+            out = dict(self._stats)
+            out.update(entries=len(self._mem), bytes=self._mem_bytes,
+                       disk_entries=len(self._disk), disk_bytes=self._disk_bytes)
+        lookups = out['hits'] + out['disk_hits'] + out['misses']
+        out['hit_rate'] = (out['hits'] + out['disk_hits']) / lookups if lookups else 0.0
+        return out
@@ -0,0 +1,260 @@
+"""
+Shared-memory ring - zero-copy audio hand-off to other processes
+One writer (the synthesizer) encodes chunks straight into a
+multiprocessing.shared_memory ring; any number of readers in other processes
+attach by name and read views of the same pages.
+
+Layout: HEADER_DTYPE (padded to DATA_OFFSET bytes), then capacity samples.
+Cursors count samples since the ring was created and never wrap; a sample at
+cursor c lives at c % capacity. The writer never waits: a reader that falls
+more than capacity samples behind has been overrun, which it detects and
+recovers from by skipping to the oldest sample still in the ring.
+
+The writer publishes the end of the write it is about to make ('writing')
+before it touches the ring and the new write cursor after, like a seqlock: a
+reader that copied samples validates the copy against 'writing', so a copy
+torn by a concurrent lapping write is never returned. Reader slots are claimed
+by exclusively creating a small per-slot shared memory segment, which is
+atomic across processes.
+"""
+
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from src.config import SAMPLE_RATE
+from src.encoders import Encoder, FORMATS
+
+RING_MAGIC = b'TSRB'
+RING_VERSION = 2
+MAX_READERS = 8
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('closed', '<u2'),              # set by the writer when it is done
+    ('format', 'S8'),               # key of encoders.FORMATS
+    ('sample_rate', '<u4'),         # rate of the samples in the ring
+    ('itemsize', '<u4'),
+    ('capacity', '<u8'),            # ring size in samples
+    ('write', '<u8'),               # total samples written
+    ('writing', '<u8'),             # end of the write in progress (== write when idle)
+    ('active', '<u1', MAX_READERS),  # reader slot in use
+    ('read', '<u8', MAX_READERS),    # per-reader cursor (published by the reader)
+    ('overruns', '<u8', MAX_READERS),
+])
+DATA_OFFSET = 256
+
+_owned = set()  # rings created by writers in this process
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # Readers must not unlink the writer's segment when they exit (Python < 3.13)
+    if shm.name not in _owned:
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+    return shm
+
+
+class ShmRingWriter:
+    def __init__(self, name=None, seconds=2.0, fmt='pcm16', sample_rate=SAMPLE_RATE, out_rate=None, seed=None):
+        """
+        Args:
+            name: Shared memory name (None = generated; see .name)
+            seconds: Ring length in seconds of output audio
+            fmt: Sample format in the ring (encoders.FORMATS)
+            sample_rate: Rate of the float chunks passed to write()
+            out_rate: Rate in the ring (defaults as for encoders.Encoder)
+            seed: Dither seed
+        """
+        self.encoder = Encoder(fmt, sample_rate, out_rate=out_rate, seed=seed)
+        self.capacity = int(seconds * self.encoder.out_rate)
+        if self.capacity <= 0:
+            raise ValueError("ring must hold at least one sample")
+        size = DATA_OFFSET + self.capacity * self.encoder.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        _owned.add(self.name)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        self.header[()] = np.zeros((), dtype=HEADER_DTYPE)
+        self.header['format'] = fmt.encode('ascii')
+        self.header['sample_rate'] = self.encoder.out_rate
+        self.header['itemsize'] = self.encoder.dtype.itemsize
+        self.header['capacity'] = self.capacity
+        self.data = np.ndarray((self.capacity,), dtype=self.encoder.dtype, buffer=self.shm.buf, offset=DATA_OFFSET)
+        # Magic last: readers treat the ring as valid once it is set
+        self.header['version'] = RING_VERSION
+        self.header['magic'] = RING_MAGIC
+
+    @property
+    def write_cursor(self):
+        return int(self.header['write'])
+
+    def write(self, chunk):
+        """Encode a float chunk into the ring; returns the number of ring samples written"""
+        n = self.encoder.output_length(len(chunk))
+        w = self.write_cursor
+        pos = w % self.capacity
+        if pos + n <= self.capacity:
+            self.header['writing'] = w + n
+            n = len(self.encoder.encode(chunk, out=self.data, offset=pos))
+        else:
+            # Wraps (or is longer than the ring, in which case only its tail survives)
+            encoded = self.encoder.encode(chunk)
+            n = len(encoded)
+            self.header['writing'] = w + n
+            keep = encoded[-self.capacity:]
+            pos = (w + n - len(keep)) % self.capacity
+            head = min(len(keep), self.capacity - pos)
+            self.data[pos:pos + head] = keep[:head]
+            self.data[:len(keep) - head] = keep[head:]
+        # Count readers this write laps (they also detect it themselves on read)
+        active = self.header['active'].astype(bool)
+        lapped = active & (w + n - self.header['read'] > self.capacity)
+        self.header['overruns'][lapped] += 1
+        self.header['write'] = self.header['writing'] = w + n
+        return n
+
+    def __call__(self, chunk):
+        return self.write(chunk)
+
+    def reader_lag(self):
+        """Samples each active reader slot is behind the writer"""
+        active = self.header['active'].astype(bool)
+        return {int(i): self.write_cursor - int(self.header['read'][i]) for i in np.flatnonzero(active)}
+
+    def close(self, unlink=True):
+        """Mark the ring finished for readers and release it (unlink removes the segment)"""
+        if self.shm is None:
+            return
+        self.header['closed'] = 1
+        self.header = self.data = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+            _owned.discard(self.name)
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShmRingReader:
+    def __init__(self, name, start='latest'):
+        """
+        Args:
+            name: Shared memory name of a ShmRingWriter
+            start: 'latest' (only audio written from now on) or 'oldest'
+                   (everything still in the ring)
+        """
+        self.shm = _attach(name)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if header['magic'] != RING_MAGIC or header['version'] != RING_VERSION:
+            self.shm.close()
+            raise ValueError(f"{name} is not a version {RING_VERSION} audio ring")
+        self.header = header
+        self.fmt = header['format'].item().decode('ascii')
+        self.dtype = FORMATS[self.fmt][0]
+        self.sample_rate = int(header['sample_rate'])
+        self.capacity = int(header['capacity'])
+        self.data = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self.shm.buf, offset=DATA_OFFSET)
+        self.slot, self._claim = self._claim_slot(name)
+        if self._claim is None:
+            self.shm.close()
+            raise RuntimeError(f"{name} already has {MAX_READERS} readers")
+        w = int(header['write'])
+        self.cursor = w if start == 'latest' else max(0, w - self.capacity)
+        header['read'][self.slot] = self.cursor
+        header['overruns'][self.slot] = 0
+        header['active'][self.slot] = 1
+        self.overruns = 0
+        self.lost = 0
+
+    @staticmethod
+    def _claim_slot(name):
+        """(slot, claim segment) of the first free slot, or (None, None); creating the segment is the atomic claim"""
+        for slot in range(MAX_READERS):
+            try:
+                return slot, shared_memory.SharedMemory(name=f"{name}-r{slot}", create=True, size=1)
+            except FileExistsError:
+                continue
+        return None, None
+
+    @property
+    def closed(self):
+        """Writer is done and everything it wrote has been read"""
+        return bool(self.header['closed']) and self.available() == 0
+
+    def available(self):
+        return min(int(self.header['write']) - self.cursor, self.capacity)
+
+    def _catch_up(self):
+        w = int(self.header['write'])
+        if w - self.cursor > self.capacity:
+            self.overruns += 1
+            self.lost += w - self.capacity - self.cursor
+            self.cursor = w - self.capacity
+        return w
+
+    def read(self, max_samples=None):
+        """
+        Zero-copy view of the next unread samples (one contiguous run, so at most
+        up to the wrap point; call again for the rest). The view aliases the ring:
+        use it before the writer laps this reader, or use read_into().
+        """
+        w = self._catch_up()
+        n = w - self.cursor
+        if max_samples is not None:
+            n = min(n, max_samples)
+        pos = self.cursor % self.capacity
+        n = min(n, self.capacity - pos)
+        view = self.data[pos:pos + n]
+        self.cursor += n
+        self.header['read'][self.slot] = self.cursor
+        return view
+
+    def read_into(self, out):
+        """
+        Copy up to len(out) samples into out (wrap handled); returns the count.
+        If the writer lapped the reader during the copy, the data is discarded,
+        the overrun is counted and 0 is returned.
+        """
+        w = self._catch_up()
+        n = min(w - self.cursor, len(out))
+        start = self.cursor
+        pos = start % self.capacity
+        head = min(n, self.capacity - pos)
+        out[:head] = self.data[pos:pos + head]
+        out[head:n] = self.data[:n - head]
+        # Torn if a write that started before or during the copy reaches past start + capacity
+        if int(self.header['writing']) - start > self.capacity:
+            self._catch_up()
+            self.header['read'][self.slot] = self.cursor
+            return 0
+        self.cursor = start + n
+        self.header['read'][self.slot] = self.cursor
+        return n
+
+    def close(self):
+        """Release the reader slot and detach"""
+        if self.shm is None:
+            return
+        self.header['active'][self.slot] = 0
+        self.header = self.data = None
+        self.shm.close()
+        self.shm = None
+        self._claim.close()
+        try:
+            self._claim.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -213,3 +213,274 @@ def normalize_audio_jit(
         output = signal.copy()
     
     return output
+
+
+@jit(nopython=True, cache=True)
+def linspace_into_jit(out, lo, hi, start, stop, ramp):
+    """
+    np.linspace(start, stop, hi - lo) written into out[lo:hi] (JIT compiled)
+    Same arithmetic as engine.linspace_into, so bit-identical
+    """
+    num = hi - lo
+    div = num - 1
+    delta = stop - start
+    if div > 0:
+        step = delta / div
+        if step == 0:
+            for i in range(num):
+                out[lo + i] = ramp[i] / div * delta
+        else:
+            for i in range(num):
+                out[lo + i] = ramp[i] * step
+    else:
+        for i in range(num):
+            out[lo + i] = ramp[i] * delta
+    for i in range(num):
+        out[lo + i] += start
+    if num > 1:
+        out[hi - 1] = stop
+
+
+@jit(nopython=True, cache=True)
+def synth_blocks_batch_jit(
+    block_ptr,
+    b0s,
+    b1s,
+    silents,
+    pitch,
+    av,
+    b_coeffs,
+    a_coeffs,
+    tilt_a,
+    gains,
+    num_formants,
+    step,
+    block_samples,
+    fs,
+    denormal_floor,
+    ring_floor,
+    ramp,
+    src,
+    out
+):
+    """
+    Voicing source, tilt filter and formant bank of synthesize() for a batch of
+    streams, every control block in one call (JIT compiled)
+    Stream k starts from reset state and runs blocks block_ptr[k]:block_ptr[k+1]
+    (frames b0s..b1s, silent or not); frame f is out[f * block_samples:]. pitch
+    and av are per frame, b_coeffs/a_coeffs (frames, F, 3) the resonators. A
+    silent block only advances the source and rings the formant bank out
+    (1024-sample pieces until the state is below ring_floor, as ring_out); a
+    voiced one runs the source scaled by AV * 0.18 through all formants in one
+    pass (each sample adds them to out in formant order) and flushes a state
+    below denormal_floor. src is scratch of the longest block. Same recursion
+    and operation order as lfilter_into_jit, no fastmath, so results match
+    synthesize()
+    """
+    a1_tilt = tilt_a[1]
+    z = np.zeros((num_formants, 2))
+    c = np.zeros((num_formants, 5))  # b0, b1, b2, a1, a2 of the current block
+    for k in range(len(block_ptr) - 1):
+        phase = 0.0
+        zt = 0.0
+        z[:] = 0.0
+        for j in range(block_ptr[k], block_ptr[k + 1]):
+            b0 = b0s[j]
+            b1 = b1s[j]
+            m = (b1 - b0) * block_samples
+            s0 = b0 * block_samples
+            mid = (b0 + b1 - 1) // 2
+            # Pitch per sample, as block_increments
+            if b1 - b0 <= step:
+                linspace_into_jit(src, 0, m, pitch[b0], pitch[b1 - 1], ramp)
+            elif step == 1:
+                for f in range(b0, b1):
+                    for i in range((f - b0) * block_samples, (f - b0 + 1) * block_samples):
+                        src[i] = pitch[f]
+            else:
+                for p0 in range(b0, b1, step):
+                    p1 = min(p0 + step, b1)
+                    linspace_into_jit(src, (p0 - b0) * block_samples, (p1 - b0) * block_samples,
+                                      pitch[p0], pitch[p1 - 1], ramp)
+            # Sawtooth from the running phase, then the spectral tilt
+            acc = 0.0
+            for i in range(m):
+                acc += src[i] / fs
+                ph = acc + phase
+                ph -= np.floor(ph)
+                src[i] = ph
+            if m > 0:
+                phase = src[m - 1]
+            for i in range(m):
+                xn = (src[i] - 0.5) * 2.0
+                yn = zt + 1.0 * xn
+                zt = xn * 0.0 - yn * a1_tilt
+                src[i] = yn
+            for f in range(num_formants):
+                c[f, 0] = b_coeffs[mid, f, 0]
+                c[f, 1] = b_coeffs[mid, f, 1]
+                c[f, 2] = b_coeffs[mid, f, 2]
+                c[f, 3] = a_coeffs[mid, f, 1]
+                c[f, 4] = a_coeffs[mid, f, 2]
+            if silents[j]:
+                for f in range(num_formants):
+                    z0 = z[f, 0]
+                    z1 = z[f, 1]
+                    if z0 == 0.0 and z1 == 0.0:
+                        continue
+                    g = gains[f]
+                    pos = 0
+                    while pos < m and max(abs(z0), abs(z1)) >= ring_floor:
+                        end = min(pos + 1024, m)
+                        for i in range(pos, end):
+                            y = z0 + c[f, 0] * 0.0
+                            z0 = z1 + 0.0 * c[f, 1] - y * c[f, 3]
+                            z1 = 0.0 * c[f, 2] - y * c[f, 4]
+                            out[s0 + i] += y * g
+                        pos = end
+                    if max(abs(z0), abs(z1)) < ring_floor:
+                        z0 = 0.0
+                        z1 = 0.0
+                    z[f, 0] = z0
+                    z[f, 1] = z1
+                continue
+            amp = av[mid] * 0.18
+            for i in range(m):
+                x = src[i] * amp
+                total = out[s0 + i]
+                for f in range(num_formants):
+                    y = z[f, 0] + c[f, 0] * x
+                    z[f, 0] = z[f, 1] + x * c[f, 1] - y * c[f, 3]
+                    z[f, 1] = x * c[f, 2] - y * c[f, 4]
+                    total += y * gains[f]
+                out[s0 + i] = total
+            for f in range(num_formants):
+                if max(abs(z[f, 0]), abs(z[f, 1])) < denormal_floor:
+                    z[f, 0] = 0.0
+                    z[f, 1] = 0.0
+
+
+@jit(nopython=True, cache=True)
+def fricative_blocks_jit(
+    starts,
+    lengths,
+    b_coeffs,
+    a_coeffs,
+    mixes,
+    amps,
+    noise,
+    out
+):
+    """
+    Frication of synthesize() for many blocks (JIT compiled)
+    Block r is samples starts[r]:starts[r] + lengths[r] of noise and out. Each
+    band q with mixes[r, q] > 0 filters the block's noise from rest with
+    b_coeffs[r, q] / a_coeffs[r, q] (lfilter_into_jit) and adds it at mix * 0.7;
+    the sum, scaled by amps[r], is added to out
+    """
+    width = 0
+    for r in range(len(starts)):
+        width = max(width, lengths[r])
+    total = np.empty(width)
+    y = np.empty(width)
+    zi = np.zeros(max(b_coeffs.shape[2], a_coeffs.shape[2]) - 1)
+    for r in range(len(starts)):
+        s0 = starts[r]
+        m = lengths[r]
+        total[:m] = 0.0
+        for q in range(mixes.shape[1]):
+            mix = mixes[r, q]
+            if mix <= 0:
+                continue
+            zi[:] = 0.0
+            lfilter_into_jit(b_coeffs[r, q], a_coeffs[r, q], noise[s0:s0 + m], zi, y[:m])
+            for i in range(m):
+                total[i] += y[i] * mix * 0.7
+        for i in range(m):
+            out[s0 + i] += total[i] * amps[r]
+
+
+@jit(nopython=True, cache=True)
+def lfilter_rows_jit(
+    b_coeffs,
+    a_coeffs,
+    x
+):
+    """
+    Each row of x filtered in place from rest, row r with b_coeffs[r] and
+    a_coeffs[r] (JIT compiled); same recursion as lfilter_into_jit
+    """
+    zi = np.zeros(max(b_coeffs.shape[1], a_coeffs.shape[1]) - 1)
+    for r in range(x.shape[0]):
+        zi[:] = 0.0
+        lfilter_into_jit(b_coeffs[r], a_coeffs[r], x[r], zi, x[r])
+
+
+@jit(nopython=True, cache=True)
+def lfilter_flush_segments_jit(
+    b_coeffs,
+    a_coeffs,
+    x,
+    bounds,
+    floor,
+    block
+):
+    """
+    engine.lfilter_flush applied in place to every segment
+    x[bounds[k]:bounds[k + 1]] (JIT compiled): each segment is filtered from
+    rest up to its last nonzero sample, then rings out in block-sized pieces
+    until the state drops below floor; the rest stays zero
+    """
+    zi = np.zeros(max(len(b_coeffs), len(a_coeffs)) - 1)
+    for k in range(len(bounds) - 1):
+        s0 = bounds[k]
+        s1 = bounds[k + 1]
+        end = s1
+        while end > s0 and x[end - 1] == 0.0:
+            end -= 1
+        zi[:] = 0.0
+        lfilter_into_jit(b_coeffs, a_coeffs, x[s0:end], zi, x[s0:end])
+        x[end:s1] = 0.0
+        pos = end
+        while pos < s1:
+            level = 0.0
+            for j in range(len(zi)):
+                level = max(level, abs(zi[j]))
+            if level < floor:
+                break
+            n = min(block, s1 - pos)
+            lfilter_into_jit(b_coeffs, a_coeffs, x[pos:pos + n], zi, x[pos:pos + n])
+            pos += n
+
+
+@jit(nopython=True, cache=True)
+def lfilter_into_jit(
+    b_coeffs,
+    a_coeffs,
+    x,
+    zi,
+    out
+):
+    """
+    scipy.signal.lfilter(b, a, x, zi=zi) without allocating (JIT compiled)
+    y is written into out (which may be x itself), the final state into zi
+    a[0] must be 1; direct form II transposed in lfilter's operation order,
+    no fastmath, so results match lfilter
+    """
+    num_b = len(b_coeffs)
+    num_a = len(a_coeffs)
+    order = max(num_b, num_a) - 1
+    for i in range(len(x)):
+        xn = x[i]
+        if order == 0:
+            out[i] = xn * b_coeffs[0]
+            continue
+        yn = zi[0] + b_coeffs[0] * xn
+        for k in range(1, order):
+            bk = b_coeffs[k] if k < num_b else 0.0
+            ak = a_coeffs[k] if k < num_a else 0.0
+            zi[k - 1] = zi[k] + xn * bk - yn * ak
+        bk = b_coeffs[order] if order < num_b else 0.0
+        ak = a_coeffs[order] if order < num_a else 0.0
+        zi[order - 1] = xn * bk - yn * ak
+        out[i] = yn
@@ -0,0 +1,141 @@
+"""
+Tracing - opt-in spans for the synthesis pipeline
+Attach a Tracer to a TailSafetyEngine (engine.tracer = Tracer()) to record a
+span per stage (front end / G2P, tracks, synthesize, post process), per chunk
+and per phoneme inside synthesize. save() writes Chrome Trace Event JSON for
+Perfetto or chrome://tracing; cost_table() aggregates synthesis time per
+phoneme type (or per phoneme) to show which code paths to target.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.phonemes import PHONEME_NAMES, PHONEME_TYPE, TYPE_NAMES
+
+
+class Tracer:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self._costs = {}  # phoneme id -> [spans, frames, samples, seconds]
+        self._lock = threading.Lock()
+
+    def _us(self, t):
+        return (t - self.t0) * 1e6
+
+    def add(self, name, cat, start, end, **args):
+        """Record a complete span from perf_counter() timestamps"""
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X', 'ts': self._us(start), 'dur': (end - start) * 1e6,
+            'pid': self.pid, 'tid': threading.get_ident(), 'args': args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, cat='stage', **args):
+        """Time a block; the yielded dict becomes the span's args (add counts to it)"""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, cat, start, time.perf_counter(), **args)
+
+    def iter(self, name, iterable, cat='stage'):
+        """Yield from iterable, recording one span per item for the time it took to produce"""
+        it = iter(iterable)
+        index = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            self.add(name, cat, start, time.perf_counter(), index=index)
+            index += 1
+            yield item
+
+    def add_phoneme_spans(self, phonemes, marks, end, block_samples, chunk=None):
+        """
+        Turn per-block timestamps of one synthesize() call into phoneme spans.
+        phonemes: (id, first frame, frames) rows from generate_tracks
+        marks: (block first frame, block start time) for each control block
+        A block's time is split across the phonemes it covers in proportion to
+        their frames in it (time is linear in frames inside a block), so a long
+        adaptive block is not charged to a single phoneme.
+        """
+        if not len(phonemes) or not marks:
+            return
+        starts, lengths = phonemes[:, 1], phonemes[:, 2]
+        n = int(starts[-1] + lengths[-1])
+        block_starts = np.array([f for f, _ in marks])
+        edges = np.interp(np.append(starts, n), np.append(block_starts, n), [t for _, t in marks] + [end])
+        first = np.searchsorted(block_starts, starts, side='right') - 1
+        last = np.searchsorted(block_starts, starts + lengths - 1, side='right') - 1
+        for i, (pid, _, frames) in enumerate(phonemes.tolist()):
+            if frames <= 0:
+                continue
+            name = PHONEME_NAMES[pid]
+            kind = TYPE_NAMES.get(int(PHONEME_TYPE[pid]), 'other')
+            self.add(name, 'phoneme', edges[i], edges[i + 1], phoneme=name, type=kind, chunk=chunk,
+                     frames=frames, samples=frames * block_samples, blocks=int(last[i] - first[i]) + 1)
+            with self._lock:
+                cost = self._costs.setdefault(pid, [0, 0, 0, 0.0])
+                cost[0] += 1
+                cost[1] += frames
+                cost[2] += frames * block_samples
+                cost[3] += edges[i + 1] - edges[i]
+
+    def phoneme_costs(self, by='type'):
+        """Rows of synthesis cost per phoneme type ('type') or per phoneme ('phoneme'), costliest first"""
+        rows = {}
+        for pid, (spans, frames, samples, secs) in self._costs.items():
+            key = TYPE_NAMES.get(int(PHONEME_TYPE[pid]), 'other') if by == 'type' else PHONEME_NAMES[pid]
+            row = rows.setdefault(key, {'name': key, 'spans': 0, 'frames': 0, 'samples': 0, 'ms': 0.0})
+            row['spans'] += spans
+            row['frames'] += frames
+            row['samples'] += samples
+            row['ms'] += secs * 1000.0
+        total = sum(r['ms'] for r in rows.values()) or 1.0
+        for r in rows.values():
+            r['us_per_frame'] = r['ms'] * 1000.0 / r['frames'] if r['frames'] else 0.0
+            r['share'] = r['ms'] / total
+        return sorted(rows.values(), key=lambda r: r['ms'], reverse=True)
+
+    def stage_costs(self):
+        """Total ms per stage span name"""
+        totals = {}
+        for e in self.events:
+            if e['cat'] == 'stage':
+                totals[e['name']] = totals.get(e['name'], 0.0) + e['dur'] / 1000.0
+        return totals
+
+    def cost_table(self, by='type'):
+        """Printable cost-per-phoneme-type table"""
+        lines = [f"{by:<18} {'spans':>6} {'frames':>8} {'ms':>9} {'us/frame':>9} {'share':>6}"]
+        for r in self.phoneme_costs(by):
+            lines.append(f"{r['name']:<18} {r['spans']:>6} {r['frames']:>8} {r['ms']:>9.1f} "
+                         f"{r['us_per_frame']:>9.1f} {r['share']:>6.1%}")
+        return '\n'.join(lines)
+
+    def to_chrome(self):
+        """Chrome Trace Event format (JSON object form)"""
+        with self._lock:
+            events = list(self.events)
+        meta = {'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': 'TailSafetyEngine'}}
+        return {'traceEvents': [meta] + events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome(), f)
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+            self._costs = {}
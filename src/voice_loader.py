@@ -3,9 +3,17 @@ Voice Loader - Dynamically loads voice profiles from the voices/ folder structur
 """
 
 import os
+import ast
 import json
+import zipfile
+from collections.abc import Mapping
 from pathlib import Path
 
+MANIFEST_NAME = ".voices_manifest.json"
+MANIFEST_VERSION = 1
+# Fields kept in the manifest so voices can be listed without loading them
+MANIFEST_FIELDS = ['name', 'gender', 'accent', 'description']
+
 
 def load_voices_from_directory(voices_dir="voices"):
     """
@@ -26,7 +34,7 @@ def load_voices_from_directory(voices_dir="voices"):
             continue
         
         # Find a .py file in the voice folder
-        py_files = list(voice_folder.glob("*.py"))
+        py_files = [f for f in voice_folder.glob("*.py") if f.name != "__init__.py"]
         if not py_files:
             print(f"Warning: No Python module found in {voice_folder.name}")
             continue
@@ -53,6 +61,203 @@ def load_voices_from_directory(voices_dir="voices"):
     return voices
 
 
+def parse_voice_profile(source, filename):
+    """
+    Extract VOICE_PROFILE from voice module source.
+    Plain dict literals are read with ast (no code runs); anything else is executed.
+    """
+    tree = ast.parse(source, filename=filename)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == "VOICE_PROFILE" for t in node.targets):
+            try:
+                return ast.literal_eval(node.value)
+            except ValueError:
+                break
+    namespace = {}
+    exec(compile(tree, filename, "exec"), namespace)
+    return namespace.get("VOICE_PROFILE")
+
+
+class VoiceRegistry(Mapping):
+    """
+    Voice profiles from voice folders and zip archives (e.g. Voices/ExtraVoices.zip).
+
+    Listing uses a cached manifest (name, gender, accent, description plus the
+    file's mtime/size or zip CRC); a profile is only read when first selected.
+    Zip archives are read in place, never extracted. Manifest entries whose
+    files changed are rebuilt on refresh().
+
+    Behaves like the dict returned by load_voices_from_directory:
+    registry[key] returns the full profile dict.
+    """
+
+    def __init__(self, *sources, manifest_path=None):
+        self.sources = [Path(s) for s in sources]
+        if manifest_path is None and self.sources:
+            manifest_path = self.sources[0] / MANIFEST_NAME
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.manifest = {}   # voice key -> listing metadata
+        self._files = {}     # file id -> manifest record
+        self._profiles = {}  # voice key -> loaded profile
+        self.refresh()
+
+    # --- discovery ---
+
+    def _voice_files(self):
+        """Yield (file_id, stamp, kind, path, member) for every voice module in the sources"""
+        for source in self.sources:
+            if source.is_file() and source.suffix == ".zip":
+                yield from self._zip_files(source)
+                continue
+            if not source.is_dir():
+                continue
+            for entry in sorted(source.iterdir()):
+                if entry.is_file() and entry.suffix == ".zip":
+                    yield from self._zip_files(entry)
+                elif entry.is_dir():
+                    py_files = sorted(f for f in entry.glob("*.py") if f.name != "__init__.py")
+                    if py_files:
+                        st = py_files[0].stat()
+                        yield str(py_files[0]), [st.st_mtime_ns, st.st_size], "file", py_files[0], None
+
+    def _zip_files(self, path):
+        st = path.stat()
+        zip_stamp = [st.st_mtime_ns, st.st_size]
+        cached = [(fid, rec) for fid, rec in self._files.items() if rec.get("zip") == str(path)]
+        if cached and all(rec["zip_stamp"] == zip_stamp for _, rec in cached):
+            # Archive untouched since the manifest was written: no need to open it
+            for fid, rec in cached:
+                yield fid, rec["stamp"], "zip", path, rec["member"]
+            return
+        try:
+            with zipfile.ZipFile(path) as zf:
+                infos = zf.infolist()
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"Error reading {path}: {e}")
+            return
+        seen = set()
+        for info in infos:
+            parts = info.filename.split("/")
+            # <voice>/<module>.py, one module per voice folder
+            if len(parts) != 2 or not parts[1].endswith(".py") or parts[1] == "__init__.py":
+                continue
+            if parts[0] in seen:
+                continue
+            seen.add(parts[0])
+            fid = f"{path}::{info.filename}"
+            self._zip_stamps[fid] = zip_stamp
+            yield fid, [info.CRC, info.file_size], "zip", path, info.filename
+
+    def _read_source(self, kind, path, member):
+        if kind == "zip":
+            with zipfile.ZipFile(path) as zf:
+                return zf.read(member).decode("utf-8"), f"{path}/{member}"
+        return Path(path).read_text(encoding="utf-8"), str(path)
+
+    def _load_file(self, kind, path, member):
+        source, filename = self._read_source(kind, path, member)
+        return parse_voice_profile(source, filename)
+
+    # --- manifest ---
+
+    def _read_manifest(self):
+        if not self.manifest_path or not self.manifest_path.is_file():
+            return {}
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def _write_manifest(self):
+        if not self.manifest_path:
+            return
+        data = {"version": MANIFEST_VERSION, "files": self._files}
+        try:
+            self.manifest_path.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+        except OSError:
+            pass  # Read-only voices folder: keep working from the in-memory manifest
+
+    def refresh(self):
+        """
+        Rescan the sources, reusing manifest entries whose files are unchanged.
+        Returns the keys of voices that were removed or whose file changed.
+        """
+        old_stamps = {key: rec["stamp"] for key, rec in getattr(self, "_records", {}).items()}
+        if not self._files:
+            self._files = self._read_manifest()
+        self._zip_stamps = {}
+        files = {}
+        changed = False
+        for fid, stamp, kind, path, member in self._voice_files():
+            rec = self._files.get(fid)
+            if rec is None or rec["stamp"] != stamp:
+                try:
+                    profile = self._load_file(kind, path, member)
+                except Exception as e:
+                    print(f"Error loading {fid}: {e}")
+                    continue
+                if not profile:
+                    print(f"Warning: No VOICE_PROFILE in {fid}")
+                    continue
+                rec = {
+                    "key": profile.get("name", Path(member or path).parent.name),
+                    "stamp": stamp,
+                    "kind": kind,
+                    "path": str(path),
+                    "member": member,
+                    "meta": {k: profile.get(k, "") for k in MANIFEST_FIELDS},
+                }
+                if kind == "zip":
+                    rec["zip"] = str(path)
+                    rec["zip_stamp"] = self._zip_stamps[fid]
+                self._profiles[rec["key"]] = profile
+                changed = True
+            elif kind == "zip" and fid in self._zip_stamps and rec["zip_stamp"] != self._zip_stamps[fid]:
+                rec = dict(rec, zip_stamp=self._zip_stamps[fid])
+                changed = True
+            files[fid] = rec
+        if set(files) != set(self._files):
+            changed = True
+        self._files = files
+        self.manifest = {rec["key"]: dict(rec["meta"]) for rec in files.values()}
+        self._records = {rec["key"]: rec for rec in files.values()}
+        for key in list(self._profiles):
+            if key not in self.manifest:
+                del self._profiles[key]
+        if changed:
+            self._write_manifest()
+        return {key for key, stamp in old_stamps.items()
+                if key not in self._records or self._records[key]["stamp"] != stamp}
+
+    # --- Mapping interface ---
+
+    def __getitem__(self, key):
+        if key not in self._profiles:
+            rec = self._records[key]
+            self._profiles[key] = self._load_file(rec["kind"], rec["path"], rec["member"])
+        return self._profiles[key]
+
+    def __iter__(self):
+        return iter(self.manifest)
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def is_loaded(self, key):
+        return key in self._profiles
+
+
+def _voice_entries(voices_dict):
+    """(key, listing data) pairs; uses a registry's manifest so nothing is loaded"""
+    if isinstance(voices_dict, VoiceRegistry):
+        return voices_dict.manifest.items()
+    return voices_dict.items()
+
+
 def get_voice_list(voices_dict):
     """
     Get a formatted list of available voices.
@@ -64,7 +269,7 @@ def get_voice_list(voices_dict):
         list: List of voices sorted by name
     """
     voice_list = []
-    for voice_key, voice_data in voices_dict.items():
+    for voice_key, voice_data in _voice_entries(voices_dict):
         voice_list.append({
             'key': voice_key,
             'name': voice_data['name'],
@@ -89,9 +294,9 @@ def get_voice_by_name(voices_dict, name):
     Returns:
         tuple: (voice_key, voice_data) or (None, None) if not found
     """
-    for voice_key, voice_data in voices_dict.items():
+    for voice_key, voice_data in _voice_entries(voices_dict):
         if voice_data['name'].lower() == name.lower():
-            return voice_key, voice_data
+            return voice_key, voices_dict[voice_key]
     
     return None, None
 
@@ -0,0 +1,72 @@
+"""
+Voice Pool - warm engines for instant voice switching
+One G2P instance and the module-level filter design cache are shared by every
+voice; per-voice constants are derived once (PreparedVoice) and each voice keeps
+a ready TailSafetyEngine, so switching is a dict lookup.
+"""
+
+from src.config import DEFAULT_QUALITY
+from src.engine import TailSafetyEngine, PreparedVoice, resolve_quality
+from src.g2p import MultiLingualG2P
+
+WARMUP_TEXT = "Hello."
+
+
+class VoicePool:
+    def __init__(self, voices, quality=DEFAULT_QUALITY, g2p=None, cache=None):
+        """
+        Args:
+            voices: Mapping of voice key -> profile dict (a plain dict or a VoiceRegistry)
+            quality: Default quality tier for the pooled engines
+            g2p: Shared MultiLingualG2P (created if not given)
+            cache: Optional RenderCache shared by all pooled engines
+        """
+        resolve_quality(quality)
+        self.voices = voices
+        self.quality = quality
+        self.g2p = g2p if g2p is not None else MultiLingualG2P()
+        self.cache = cache
+        self._prepared = {}
+        self._engines = {}
+
+    def prepare(self, key):
+        """PreparedVoice for key, validated and derived on first use"""
+        if key not in self._prepared:
+            self._prepared[key] = PreparedVoice(self.voices[key])
+        return self._prepared[key]
+
+    def engine(self, key):
+        """Warm engine for a voice; repeated calls return the same engine"""
+        if key not in self._engines:
+            self._engines[key] = TailSafetyEngine(
+                voice_profile=self.prepare(key), quality=self.quality, g2p=self.g2p, cache=self.cache
+            )
+        return self._engines[key]
+
+    def warm(self, keys=None, text=WARMUP_TEXT):
+        """
+        Prepare engines up front and render a short phrase once, so imports,
+        G2P and filter designs are primed before the first real utterance.
+        """
+        keys = list(self.voices) if keys is None else list(keys)
+        for key in keys:
+            self.engine(key)
+        if keys:
+            self.engine(keys[0]).render(text)
+        return self
+
+    def clear(self, keys=None):
+        """Drop prepared voices and engines, all or only keys (e.g. those a registry refresh changed)"""
+        if keys is None:
+            self._prepared.clear()
+            self._engines.clear()
+            return
+        for key in keys:
+            self._prepared.pop(key, None)
+            self._engines.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.voices
+
+    def __len__(self):
+        return len(self.voices)